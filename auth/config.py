@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = Field(default="postgres")
     POSTGRES_PORT: str = Field(default="5432")
     CORS_ORIGINS: List[str] = Field(default_factory=lambda: ["http://89.104.68.136:5173"])
+    TEAMS_PAGE_SIZE: int = Field(default=20)
+    TEAMS_MAX_PAGE_SIZE: int = Field(default=100)
+    TEAMS_CACHE_TTL: float = Field(default=30.0)
+    TEAMS_BULK_INVITE_MAX: int = Field(default=1000)
 
     @property
     def POSTGRES_URL(self):
@@ -6,12 +6,14 @@ import uvicorn
 from auth.src.routers import router as router_auth
 from fastapi.middleware.cors import CORSMiddleware
 from auth.config import settings
+from common.stats import router as router_stats
+from common.jwt.revocation import revocation_lifespan
 
 
 from fastapi import Response
 
 
-app = FastAPI()
+app = FastAPI(lifespan=revocation_lifespan)
 
 
 # @app.middleware("http")
@@ -45,6 +47,7 @@ app.add_middleware(
 
 
 app.include_router(router_auth)
+app.include_router(router_stats)
 
 
 
@@ -0,0 +1,102 @@
+import threading
+
+from auth.config import settings
+from common.jwt import schemas
+from db.cache import entity_cache
+
+
+class TeamListCache:
+    """
+    Страницы списка команд пользователя с TTL в общем бэкенде кэша строк (db.cache).
+
+    Сервисов и воркеров несколько, поэтому сброс - это смена поколения в
+    общем бэкенде, а не удаление записей в памяти процесса. Ключ страницы
+    содержит поколение пользователя (invalidate_user), вместе со страницей
+    хранятся поколения её команд (invalidate_team), так как в ней есть число
+    участников: страница с устаревшей командой считается промахом.
+    """
+
+    def __init__(self, backend, ttl: float = 30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _user_generation_key(user_id) -> str:
+        return f"teams:user:{user_id}:generation"
+
+    @staticmethod
+    def _team_generation_key(team_id) -> str:
+        return f"teams:team:{team_id}:generation"
+
+    async def get(self, user_id, cursor: str | None, limit: int):
+        """
+        Страница и поколение пользователя; поколение передаётся в put, чтобы
+        страница, прочитанная до записи, легла под старый ключ
+        """
+        generation = int(await self.backend.get(self._user_generation_key(user_id)) or 0)
+        entry = None
+        if self.ttl > 0:
+            entry = await self.backend.get(self._page_key(user_id, generation, cursor, limit))
+        if entry is not None:
+            team_ids = list(entry["teams"])
+            current = await self.backend.get_many([self._team_generation_key(team_id) for team_id in team_ids])
+            if all(int(value or 0) == entry["teams"][team_id] for team_id, value in zip(team_ids, current)):
+                self._count("hits")
+                return schemas.TeamPage.model_validate(entry["page"]), generation
+        self._count("misses")
+        return None, generation
+
+    async def put(self, user_id, generation: int, cursor: str | None, limit: int, page, team_ids):
+        if self.ttl <= 0:
+            return
+        team_ids = [str(team_id) for team_id in team_ids]
+        # Поколения команд известны только после запроса; сброс команды между
+        # запросом и put остаётся видимым не дольше ttl
+        current = await self.backend.get_many([self._team_generation_key(team_id) for team_id in team_ids])
+        entry = {
+            "page": page.model_dump(mode="json"),
+            "teams": {team_id: int(value or 0) for team_id, value in zip(team_ids, current)},
+        }
+        await self.backend.set(self._page_key(user_id, generation, cursor, limit), entry, self.ttl)
+
+    async def invalidate_user(self, user_id):
+        await self._bump(self._user_generation_key(user_id))
+
+    async def invalidate_team(self, team_id):
+        await self._bump(self._team_generation_key(team_id))
+
+    async def _bump(self, key: str):
+        # Вызывается после коммита: ошибка бэкенда не должна выглядеть как сбой записи
+        try:
+            await self.backend.incr(key)
+        except Exception as ex:
+            print(f"Не удалось сбросить кэш списка команд ({key}): {ex}")
+            return
+        self._count("invalidations")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl": self.ttl,
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _page_key(user_id, generation: int, cursor: str | None, limit: int) -> str:
+        return f"teams:page:{user_id}:{generation}:{cursor or ''}:{limit}"
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+team_list_cache = TeamListCache(entity_cache.backend, ttl=settings.TEAMS_CACHE_TTL)
@@ -0,0 +1,20 @@
+import base64
+import uuid
+from datetime import datetime
+
+from common.exceptions import BadRequestException
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """Курсор keyset-пагинации: позиция последней записи страницы (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (ValueError, UnicodeDecodeError):
+        raise BadRequestException(detail="Invalid cursor")
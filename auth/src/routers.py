@@ -1,16 +1,19 @@
-from sqlalchemy import select, func
+import uuid
+
+from sqlalchemy import select, func, and_, tuple_
 from typing import Annotated
 from datetime import datetime
 from fastapi.requests import Request
 
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Response, Cookie
 from sqlalchemy import insert, update, join
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from db.database import get_db
 from common.jwt import schemas
-from common.jwt.hash import get_password_hash
+from common.jwt.hash import hash_password_async
 from common.jwt.jwt import (
     create_token_pair,
     refresh_token_state,
@@ -20,6 +23,11 @@ from common.jwt.jwt import (
     JTI,
     EXP, oauth2_scheme,
 )
+from common.jwt.revocation import revoked_tokens
+from auth.src.dependencies import get_user_profile, CurrentPrincipal
+from auth.src.cache import team_list_cache
+from auth.src.pagination import encode_cursor, decode_cursor
+from auth.config import settings
 from common.exceptions import BadRequestException, ForbiddenException
 from db.models.users import User, BlackListToken, UserTeams, Teams, InviteStatus
 
@@ -42,7 +50,7 @@ async def register(
 
     # hashing password
     user_data = data.dict(exclude={"confirm_password"})
-    user_data["password"] = get_password_hash(user_data["password"])
+    user_data["password"] = await hash_password_async(user_data["password"])
 
     # save user to db
     user = User(**user_data)
@@ -99,6 +107,8 @@ async def logout(
         id=payload[JTI], expire=datetime.utcfromtimestamp(payload[EXP])
     )
     await black_listed.save(db=db)
+    # Остальные процессы узнают об отзыве при следующем опросе blacklisttokens
+    revoked_tokens.add(payload[JTI], black_listed.expire)
 
     return {"msg": "Succesfully logout"}
 
@@ -107,22 +117,18 @@ async def logout(
 @router.get("/me", response_model=schemas.User)
 async def me(
     request: Request,
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: AsyncSession = Depends(get_db),
+    profile: Annotated[schemas.User, Depends(get_user_profile)],
 ):
-    token_data = await decode_access_token(token=token, db=db)
-    expr = (User.user_uuid == token_data[SUB])
-    return await User.find_by_expr(db=db, expr=expr)
+    return profile
 
 
 @router.post("/teams/create")
 async def create_team(
     data: schemas.TeamCreate,
-    token: Annotated[str, Depends(oauth2_scheme)],
+    principal: CurrentPrincipal,
     db: AsyncSession = Depends(get_db),
 ):
-    token_data = await decode_access_token(token=token, db=db)
-    user_id = token_data[SUB]
+    user_id = principal.user_id
 
     team = Teams(name=data.name, description=data.description, pool=data.pool)
     db.add(team)
@@ -131,40 +137,42 @@ async def create_team(
     link = UserTeams(user_id=user_id, team_id=team.id, status=InviteStatus.accepted)
     db.add(link)
     await db.commit()
+    await team_list_cache.invalidate_user(user_id)
     return {"team_id": team.id, "name": team.name}
 
-# id: 2,
-#   //       name: 'Разработчики',
-#   //       members: [
-#   //         {
-#   //           id: 2,
-#   //           name: 'Разработчик',
-#   //           email: 'dev@example.com',
-#   //           role: 'member',
-#   //           joinedAt: new Date()
-#   //         }
-#   //       ],
-#   //       createdAt: new Date()
-@router.get("/teams", )
+
+def _page_limit(limit: int | None) -> int:
+    if limit is None:
+        return settings.TEAMS_PAGE_SIZE
+    return max(1, min(limit, settings.TEAMS_MAX_PAGE_SIZE))
+
+
+@router.get("/teams", response_model=schemas.TeamPage, response_model_by_alias=True)
 async def get_teams(
-        token: Annotated[str, Depends(oauth2_scheme)],
+        principal: CurrentPrincipal,
+        cursor: str | None = None,
+        limit: int | None = None,
         db: AsyncSession = Depends(get_db),
 ):
-    token_data = await decode_access_token(token=token, db=db)
-    user_id = token_data[SUB]
-
-    # query_join = join(
-    #     Teams, user_id, UserTeams.team_id == Teams.id
-    # ).join(
-    #     User, UserTeams.team_id == Teams.id
-    # )
-
-    subq = (
-        select(UserTeams.team_id)
-        .where(UserTeams.user_id == user_id)
-        .subquery()
+    """
+    Команды текущего пользователя, новые первыми.
+
+    Страница выбирается по курсору (created_at, id) последней команды
+    предыдущей страницы, участники не агрегируются - только их число,
+    состав отдаёт /teams/{team_id}/members.
+    """
+    user_id = principal.user_id
+    limit = _page_limit(limit)
+    page, generation = await team_list_cache.get(user_id, cursor, limit)
+    if page is not None:
+        return page
+
+    member_count = (
+        select(func.count())
+        .where(UserTeams.team_id == Teams.id)
+        .correlate(Teams)
+        .scalar_subquery()
     )
-
     query = (
         select(
             Teams.id,
@@ -173,23 +181,86 @@ async def get_teams(
             Teams.pool,
             Teams.created_at,
             Teams.updated_at,
-            func.json_agg(
-                func.json_build_object(
-                    'id', User.user_uuid,
-                    'email', User.email
-                )
-            ).label('members')
+            UserTeams.status,
+            member_count.label("member_count"),
         )
-        .select_from(Teams)
-        .join(UserTeams, UserTeams.team_id == Teams.id)
-        .join(User, UserTeams.user_id == User.user_uuid)
-        .where(Teams.id.in_(subq))
-        .group_by(Teams.id)
+        .join(UserTeams, and_(UserTeams.team_id == Teams.id, UserTeams.user_id == user_id))
+        .order_by(Teams.created_at.desc(), Teams.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, team_id = decode_cursor(cursor)
+        query = query.where(tuple_(Teams.created_at, Teams.id) < tuple_(created_at, team_id))
+
+    rows = (await db.execute(query)).mappings().all()
+    items = [
+        schemas.TeamSummary(**{**row, "status": row["status"].value})
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+    page = schemas.TeamPage(items=items, next_cursor=next_cursor)
+    await team_list_cache.put(user_id, generation, cursor, limit, page, [item.id for item in items])
+    return page
+
+
+async def _require_accepted_member(db: AsyncSession, team_id, user_id):
+    """Приглашённые и отказавшиеся - ещё не участники команды"""
+    membership = await UserTeams.find_by_expr(
+        db=db,
+        expr=and_(
+            UserTeams.team_id == team_id,
+            UserTeams.user_id == user_id,
+            UserTeams.status == InviteStatus.accepted,
+        ),
     )
+    if membership is None:
+        raise ForbiddenException()
 
-    result = await db.execute(query)
-    teams_with_members = result.mappings().all()
-    return teams_with_members
+
+@router.get("/teams/{team_id}/members", response_model=schemas.TeamMemberPage, response_model_by_alias=True)
+async def get_team_members(
+        team_id: uuid.UUID,
+        principal: CurrentPrincipal,
+        cursor: str | None = None,
+        limit: int | None = None,
+        db: AsyncSession = Depends(get_db),
+):
+    """Участники команды в порядке вступления, страницами по курсору (created_at, id)"""
+    await _require_accepted_member(db, team_id, principal.user_id)
+
+    limit = _page_limit(limit)
+    query = (
+        select(
+            User.user_uuid.label("id"),
+            User.email,
+            User.firstname,
+            User.lastname,
+            UserTeams.status,
+            UserTeams.created_at.label("joined_at"),
+            UserTeams.id.label("link_id"),
+        )
+        .join(User, UserTeams.user_id == User.user_uuid)
+        .where(UserTeams.team_id == team_id)
+        .order_by(UserTeams.created_at, UserTeams.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, link_id = decode_cursor(cursor)
+        query = query.where(tuple_(UserTeams.created_at, UserTeams.id) > tuple_(created_at, link_id))
+
+    rows = (await db.execute(query)).mappings().all()
+    items = [
+        schemas.TeamMember(**{**row, "status": row["status"].value})
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["joined_at"], last["link_id"])
+    return schemas.TeamMemberPage(items=items, next_cursor=next_cursor)
 
 
 @router.post("/teams/{team_id}/invite")
@@ -208,23 +279,75 @@ async def invite_user(
     )
     await db.execute(stmt)
     await db.commit()
+    await team_list_cache.invalidate_user(invited_user.user_uuid)
+    await team_list_cache.invalidate_team(team_id)
     return {"msg": f"User {data.email} invited to team {team_id}"}
 
 
+@router.post("/teams/{team_id}/invite/bulk", response_model=schemas.BulkInviteResult, response_model_by_alias=True)
+async def bulk_invite_users(
+    team_id: uuid.UUID,
+    data: schemas.BulkInviteUsers,
+    principal: CurrentPrincipal,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Приглашает в команду сразу много пользователей.
+
+    Почты разрешаются одним запросом IN, приглашения вставляются одним
+    INSERT ... ON CONFLICT DO NOTHING RETURNING: кто уже в команде,
+    конфликтует по (user_id, team_id) и не попадает в RETURNING.
+    """
+    emails = list(dict.fromkeys(email.strip() for email in data.emails if email.strip()))
+    if len(emails) > settings.TEAMS_BULK_INVITE_MAX:
+        raise BadRequestException(detail=f"Too many emails, max {settings.TEAMS_BULK_INVITE_MAX}")
+
+    await _require_accepted_member(db, team_id, principal.user_id)
+    if not emails:
+        return schemas.BulkInviteResult(invited=[], already_member=[], unknown=[])
+
+    result = await db.execute(select(User.user_uuid, User.email).where(User.email.in_(emails)))
+    users = {email: user_uuid for user_uuid, email in result.all()}
+
+    invited_ids = set()
+    if users:
+        stmt = (
+            pg_insert(UserTeams)
+            .values([
+                {"id": uuid.uuid4(), "user_id": user_uuid, "team_id": team_id, "status": InviteStatus.invited}
+                for user_uuid in users.values()
+            ])
+            .on_conflict_do_nothing(index_elements=[UserTeams.user_id, UserTeams.team_id])
+            .returning(UserTeams.user_id)
+        )
+        invited_ids = set((await db.execute(stmt)).scalars().all())
+        await db.commit()
+
+    for user_uuid in invited_ids:
+        await team_list_cache.invalidate_user(user_uuid)
+    if invited_ids:
+        await team_list_cache.invalidate_team(team_id)
+
+    return schemas.BulkInviteResult(
+        invited=[email for email in emails if email in users and users[email] in invited_ids],
+        already_member=[email for email in emails if email in users and users[email] not in invited_ids],
+        unknown=[email for email in emails if email not in users],
+    )
+
+
 @router.post("/teams/respond")
 async def respond_to_invite(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    principal: CurrentPrincipal,
     data: schemas.UpdateInviteStatus,
     db: AsyncSession = Depends(get_db),
 ):
-    token_data = await decode_access_token(token=token, db=db)
-    user_id = token_data[SUB]
+    user_id = principal.user_id
     stmt = update(UserTeams).where(
         UserTeams.user_id == user_id,
         UserTeams.team_id == data.team_id
     ).values(status=InviteStatus[data.status])
     await db.execute(stmt)
     await db.commit()
+    await team_list_cache.invalidate_user(user_id)
+    await team_list_cache.invalidate_team(data.team_id)
     return {"msg": f"Your invite to team {data.team_id} was {data.status}"}
-
-
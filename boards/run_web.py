@@ -6,8 +6,10 @@ import uvicorn
 from boards.src.routers import router as router_auth
 from fastapi.middleware.cors import CORSMiddleware
 from boards.config import settings
+from common.stats import router as router_stats
+from common.jwt.revocation import revocation_lifespan
 
-app = FastAPI()
+app = FastAPI(lifespan=revocation_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +20,7 @@ app.add_middleware(
 )
 
 app.include_router(router_auth)
+app.include_router(router_stats)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
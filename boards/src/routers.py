@@ -1,9 +1,7 @@
-from typing import Annotated
-
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from common.jwt.jwt import oauth2_scheme, decode_access_token, SUB
+from common.jwt.deps import CurrentPrincipal
 
 from boards.src.schemas import BoardCreate, BoardOut
 from db.database import get_db
@@ -14,19 +12,15 @@ router = APIRouter(prefix="/boards", tags=["boards"])
 
 @router.post("/", response_model=BoardOut)
 async def create_new_board(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    principal: CurrentPrincipal,
     board: BoardCreate,
     db: AsyncSession = Depends(get_db),
 ):
-    token_payload = await decode_access_token(token, db)
-    user_id = token_payload[SUB]
-    return await create_board(db, board, user_id)
+    return await create_board(db, board, principal.user_id)
 
 @router.get("/", response_model=list[BoardOut])
 async def list_my_boards(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    principal: CurrentPrincipal,
     db: AsyncSession = Depends(get_db),
 ):
-    token_payload = await decode_access_token(token, db)
-    user_id = token_payload[SUB]
-    return await get_boards_by_owner(db, user_id)
\ No newline at end of file
+    return await get_boards_by_owner(db, principal.user_id)
\ No newline at end of file
@@ -5,11 +5,9 @@ from boards.src.schemas import BoardCreate
 from uuid import UUID
 
 async def create_board(db: AsyncSession, data: BoardCreate, user_id: UUID) -> Board:
-    board = Board(title=data.title, is_public=data.is_public, owner_id=user_id)
-    db.add(board)
-    await db.commit()
-    await db.refresh(board)
-    return board
+    return await Board.insert_returning(
+        db, {"title": data.title, "is_public": data.is_public, "owner_id": user_id}
+    )
 
 async def get_boards_by_owner(db: AsyncSession, user_id: UUID):
     result = await db.execute(select(Board).where(Board.owner_id == user_id))
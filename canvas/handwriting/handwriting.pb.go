@@ -1,7 +1,7 @@
 // Code generated by protoc-gen-go. DO NOT EDIT.
 // versions:
 // 	protoc-gen-go v1.36.6
-// 	protoc        v3.19.6
+// 	protoc        v3.21.12
 // source: handwriting.proto
 
 package handwritingpb
@@ -142,10 +142,13 @@ func (x *DrawEvent) GetTimestamp() int64 {
 }
 
 type DrawPayload struct {
-	state         protoimpl.MessageState `protogen:"open.v1"`
-	Points        []*Point               `protobuf:"bytes,1,rep,name=points,proto3" json:"points,omitempty"`
-	Color         string                 `protobuf:"bytes,2,opt,name=color,proto3" json:"color,omitempty"`
-	Thickness     int32                  `protobuf:"varint,3,opt,name=thickness,proto3" json:"thickness,omitempty"`
+	state     protoimpl.MessageState `protogen:"open.v1"`
+	Points    []*Point               `protobuf:"bytes,1,rep,name=points,proto3" json:"points,omitempty"`
+	Color     string                 `protobuf:"bytes,2,opt,name=color,proto3" json:"color,omitempty"`
+	Thickness int32                  `protobuf:"varint,3,opt,name=thickness,proto3" json:"thickness,omitempty"`
+	// Компактная форма точек: x0, y0, x1, y1, ... как little-endian float32.
+	// Если поле заполнено, points игнорируется, ответ приходит в той же форме.
+	PackedPoints  []byte `protobuf:"bytes,4,opt,name=packed_points,json=packedPoints,proto3" json:"packed_points,omitempty"`
 	unknownFields protoimpl.UnknownFields
 	sizeCache     protoimpl.SizeCache
 }
@@ -201,6 +204,13 @@ func (x *DrawPayload) GetThickness() int32 {
 	return 0
 }
 
+func (x *DrawPayload) GetPackedPoints() []byte {
+	if x != nil {
+		return x.PackedPoints
+	}
+	return nil
+}
+
 type Point struct {
 	state         protoimpl.MessageState `protogen:"open.v1"`
 	X             float64                `protobuf:"fixed64,1,opt,name=x,proto3" json:"x,omitempty"`
@@ -297,6 +307,150 @@ func (x *HandwritingResponse) GetEvents() []*DrawEvent {
 	return nil
 }
 
+type StrokeChunk struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	StrokeId      string                 `protobuf:"bytes,1,opt,name=stroke_id,json=strokeId,proto3" json:"stroke_id,omitempty"`             // Идентификатор штриха в рамках потока
+	Points        []*Point               `protobuf:"bytes,2,rep,name=points,proto3" json:"points,omitempty"`                                 // Новые точки штриха
+	End           bool                   `protobuf:"varint,3,opt,name=end,proto3" json:"end,omitempty"`                                      // Последний фрагмент штриха
+	PackedPoints  []byte                 `protobuf:"bytes,4,opt,name=packed_points,json=packedPoints,proto3" json:"packed_points,omitempty"` // Компактная форма points, как в DrawPayload
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *StrokeChunk) Reset() {
+	*x = StrokeChunk{}
+	mi := &file_handwriting_proto_msgTypes[5]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *StrokeChunk) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*StrokeChunk) ProtoMessage() {}
+
+func (x *StrokeChunk) ProtoReflect() protoreflect.Message {
+	mi := &file_handwriting_proto_msgTypes[5]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use StrokeChunk.ProtoReflect.Descriptor instead.
+func (*StrokeChunk) Descriptor() ([]byte, []int) {
+	return file_handwriting_proto_rawDescGZIP(), []int{5}
+}
+
+func (x *StrokeChunk) GetStrokeId() string {
+	if x != nil {
+		return x.StrokeId
+	}
+	return ""
+}
+
+func (x *StrokeChunk) GetPoints() []*Point {
+	if x != nil {
+		return x.Points
+	}
+	return nil
+}
+
+func (x *StrokeChunk) GetEnd() bool {
+	if x != nil {
+		return x.End
+	}
+	return false
+}
+
+func (x *StrokeChunk) GetPackedPoints() []byte {
+	if x != nil {
+		return x.PackedPoints
+	}
+	return nil
+}
+
+type SmoothedChunk struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	StrokeId      string                 `protobuf:"bytes,1,opt,name=stroke_id,json=strokeId,proto3" json:"stroke_id,omitempty"`
+	Offset        uint32                 `protobuf:"varint,2,opt,name=offset,proto3" json:"offset,omitempty"`                                // Индекс первой точки фрагмента в штрихе
+	Points        []*Point               `protobuf:"bytes,3,rep,name=points,proto3" json:"points,omitempty"`                                 // Окончательно сглаженные точки, повторно не присылаются
+	End           bool                   `protobuf:"varint,4,opt,name=end,proto3" json:"end,omitempty"`                                      // Штрих завершён
+	PackedPoints  []byte                 `protobuf:"bytes,5,opt,name=packed_points,json=packedPoints,proto3" json:"packed_points,omitempty"` // Заполняется вместо points, если фрагмент пришёл в компактной форме
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *SmoothedChunk) Reset() {
+	*x = SmoothedChunk{}
+	mi := &file_handwriting_proto_msgTypes[6]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *SmoothedChunk) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*SmoothedChunk) ProtoMessage() {}
+
+func (x *SmoothedChunk) ProtoReflect() protoreflect.Message {
+	mi := &file_handwriting_proto_msgTypes[6]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use SmoothedChunk.ProtoReflect.Descriptor instead.
+func (*SmoothedChunk) Descriptor() ([]byte, []int) {
+	return file_handwriting_proto_rawDescGZIP(), []int{6}
+}
+
+func (x *SmoothedChunk) GetStrokeId() string {
+	if x != nil {
+		return x.StrokeId
+	}
+	return ""
+}
+
+func (x *SmoothedChunk) GetOffset() uint32 {
+	if x != nil {
+		return x.Offset
+	}
+	return 0
+}
+
+func (x *SmoothedChunk) GetPoints() []*Point {
+	if x != nil {
+		return x.Points
+	}
+	return nil
+}
+
+func (x *SmoothedChunk) GetEnd() bool {
+	if x != nil {
+		return x.End
+	}
+	return false
+}
+
+func (x *SmoothedChunk) GetPackedPoints() []byte {
+	if x != nil {
+		return x.PackedPoints
+	}
+	return nil
+}
+
 var File_handwriting_proto protoreflect.FileDescriptor
 
 const file_handwriting_proto_rawDesc = "" +
@@ -309,18 +463,31 @@ const file_handwriting_proto_rawDesc = "" +
 	"\auser_id\x18\x02 \x01(\tR\x06userId\x12\x19\n" +
 	"\bboard_id\x18\x03 \x01(\tR\aboardId\x122\n" +
 	"\apayload\x18\x04 \x01(\v2\x18.handwriting.DrawPayloadR\apayload\x12\x1c\n" +
-	"\ttimestamp\x18\x05 \x01(\x03R\ttimestamp\"m\n" +
+	"\ttimestamp\x18\x05 \x01(\x03R\ttimestamp\"\x92\x01\n" +
 	"\vDrawPayload\x12*\n" +
 	"\x06points\x18\x01 \x03(\v2\x12.handwriting.PointR\x06points\x12\x14\n" +
 	"\x05color\x18\x02 \x01(\tR\x05color\x12\x1c\n" +
-	"\tthickness\x18\x03 \x01(\x05R\tthickness\"#\n" +
+	"\tthickness\x18\x03 \x01(\x05R\tthickness\x12#\n" +
+	"\rpacked_points\x18\x04 \x01(\fR\fpackedPoints\"#\n" +
 	"\x05Point\x12\f\n" +
 	"\x01x\x18\x01 \x01(\x01R\x01x\x12\f\n" +
 	"\x01y\x18\x02 \x01(\x01R\x01y\"E\n" +
 	"\x13HandwritingResponse\x12.\n" +
-	"\x06events\x18\x01 \x03(\v2\x16.handwriting.DrawEventR\x06events2i\n" +
+	"\x06events\x18\x01 \x03(\v2\x16.handwriting.DrawEventR\x06events\"\x8d\x01\n" +
+	"\vStrokeChunk\x12\x1b\n" +
+	"\tstroke_id\x18\x01 \x01(\tR\bstrokeId\x12*\n" +
+	"\x06points\x18\x02 \x03(\v2\x12.handwriting.PointR\x06points\x12\x10\n" +
+	"\x03end\x18\x03 \x01(\bR\x03end\x12#\n" +
+	"\rpacked_points\x18\x04 \x01(\fR\fpackedPoints\"\xa7\x01\n" +
+	"\rSmoothedChunk\x12\x1b\n" +
+	"\tstroke_id\x18\x01 \x01(\tR\bstrokeId\x12\x16\n" +
+	"\x06offset\x18\x02 \x01(\rR\x06offset\x12*\n" +
+	"\x06points\x18\x03 \x03(\v2\x12.handwriting.PointR\x06points\x12\x10\n" +
+	"\x03end\x18\x04 \x01(\bR\x03end\x12#\n" +
+	"\rpacked_points\x18\x05 \x01(\fR\fpackedPoints2\xb5\x01\n" +
 	"\x15HandwritingRecognizer\x12P\n" +
-	"\tRecognize\x12\x1f.handwriting.HandwritingRequest\x1a .handwriting.HandwritingResponse\"\x00B\x1dZ\x1b./handwriting;handwritingpbb\x06proto3"
+	"\tRecognize\x12\x1f.handwriting.HandwritingRequest\x1a .handwriting.HandwritingResponse\"\x00\x12J\n" +
+	"\fSmoothStream\x12\x18.handwriting.StrokeChunk\x1a\x1a.handwriting.SmoothedChunk\"\x00(\x010\x01B\x1dZ\x1b./handwriting;handwritingpbb\x06proto3"
 
 var (
 	file_handwriting_proto_rawDescOnce sync.Once
@@ -334,26 +501,32 @@ func file_handwriting_proto_rawDescGZIP() []byte {
 	return file_handwriting_proto_rawDescData
 }
 
-var file_handwriting_proto_msgTypes = make([]protoimpl.MessageInfo, 5)
+var file_handwriting_proto_msgTypes = make([]protoimpl.MessageInfo, 7)
 var file_handwriting_proto_goTypes = []any{
 	(*HandwritingRequest)(nil),  // 0: handwriting.HandwritingRequest
 	(*DrawEvent)(nil),           // 1: handwriting.DrawEvent
 	(*DrawPayload)(nil),         // 2: handwriting.DrawPayload
 	(*Point)(nil),               // 3: handwriting.Point
 	(*HandwritingResponse)(nil), // 4: handwriting.HandwritingResponse
+	(*StrokeChunk)(nil),         // 5: handwriting.StrokeChunk
+	(*SmoothedChunk)(nil),       // 6: handwriting.SmoothedChunk
 }
 var file_handwriting_proto_depIdxs = []int32{
 	1, // 0: handwriting.HandwritingRequest.events:type_name -> handwriting.DrawEvent
 	2, // 1: handwriting.DrawEvent.payload:type_name -> handwriting.DrawPayload
 	3, // 2: handwriting.DrawPayload.points:type_name -> handwriting.Point
 	1, // 3: handwriting.HandwritingResponse.events:type_name -> handwriting.DrawEvent
-	0, // 4: handwriting.HandwritingRecognizer.Recognize:input_type -> handwriting.HandwritingRequest
-	4, // 5: handwriting.HandwritingRecognizer.Recognize:output_type -> handwriting.HandwritingResponse
-	5, // [5:6] is the sub-list for method output_type
-	4, // [4:5] is the sub-list for method input_type
-	4, // [4:4] is the sub-list for extension type_name
-	4, // [4:4] is the sub-list for extension extendee
-	0, // [0:4] is the sub-list for field type_name
+	3, // 4: handwriting.StrokeChunk.points:type_name -> handwriting.Point
+	3, // 5: handwriting.SmoothedChunk.points:type_name -> handwriting.Point
+	0, // 6: handwriting.HandwritingRecognizer.Recognize:input_type -> handwriting.HandwritingRequest
+	5, // 7: handwriting.HandwritingRecognizer.SmoothStream:input_type -> handwriting.StrokeChunk
+	4, // 8: handwriting.HandwritingRecognizer.Recognize:output_type -> handwriting.HandwritingResponse
+	6, // 9: handwriting.HandwritingRecognizer.SmoothStream:output_type -> handwriting.SmoothedChunk
+	8, // [8:10] is the sub-list for method output_type
+	6, // [6:8] is the sub-list for method input_type
+	6, // [6:6] is the sub-list for extension type_name
+	6, // [6:6] is the sub-list for extension extendee
+	0, // [0:6] is the sub-list for field type_name
 }
 
 func init() { file_handwriting_proto_init() }
@@ -367,7 +540,7 @@ func file_handwriting_proto_init() {
 			GoPackagePath: reflect.TypeOf(x{}).PkgPath(),
 			RawDescriptor: unsafe.Slice(unsafe.StringData(file_handwriting_proto_rawDesc), len(file_handwriting_proto_rawDesc)),
 			NumEnums:      0,
-			NumMessages:   5,
+			NumMessages:   7,
 			NumExtensions: 0,
 			NumServices:   1,
 		},
@@ -1,7 +1,7 @@
 // Code generated by protoc-gen-go-grpc. DO NOT EDIT.
 // versions:
 // - protoc-gen-go-grpc v1.5.1
-// - protoc             v3.19.6
+// - protoc             v3.21.12
 // source: handwriting.proto
 
 package handwritingpb
@@ -19,7 +19,8 @@ import (
 const _ = grpc.SupportPackageIsVersion9
 
 const (
-	HandwritingRecognizer_Recognize_FullMethodName = "/handwriting.HandwritingRecognizer/Recognize"
+	HandwritingRecognizer_Recognize_FullMethodName    = "/handwriting.HandwritingRecognizer/Recognize"
+	HandwritingRecognizer_SmoothStream_FullMethodName = "/handwriting.HandwritingRecognizer/SmoothStream"
 )
 
 // HandwritingRecognizerClient is the client API for HandwritingRecognizer service.
@@ -27,6 +28,8 @@ const (
 // For semantics around ctx use and closing/ending streaming RPCs, please refer to https://pkg.go.dev/google.golang.org/grpc/?tab=doc#ClientConn.NewStream.
 type HandwritingRecognizerClient interface {
 	Recognize(ctx context.Context, in *HandwritingRequest, opts ...grpc.CallOption) (*HandwritingResponse, error)
+	// Сглаживание штрихов по мере рисования: точки приходят фрагментами
+	SmoothStream(ctx context.Context, opts ...grpc.CallOption) (grpc.BidiStreamingClient[StrokeChunk, SmoothedChunk], error)
 }
 
 type handwritingRecognizerClient struct {
@@ -47,11 +50,26 @@ func (c *handwritingRecognizerClient) Recognize(ctx context.Context, in *Handwri
 	return out, nil
 }
 
+func (c *handwritingRecognizerClient) SmoothStream(ctx context.Context, opts ...grpc.CallOption) (grpc.BidiStreamingClient[StrokeChunk, SmoothedChunk], error) {
+	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
+	stream, err := c.cc.NewStream(ctx, &HandwritingRecognizer_ServiceDesc.Streams[0], HandwritingRecognizer_SmoothStream_FullMethodName, cOpts...)
+	if err != nil {
+		return nil, err
+	}
+	x := &grpc.GenericClientStream[StrokeChunk, SmoothedChunk]{ClientStream: stream}
+	return x, nil
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type HandwritingRecognizer_SmoothStreamClient = grpc.BidiStreamingClient[StrokeChunk, SmoothedChunk]
+
 // HandwritingRecognizerServer is the server API for HandwritingRecognizer service.
 // All implementations must embed UnimplementedHandwritingRecognizerServer
 // for forward compatibility.
 type HandwritingRecognizerServer interface {
 	Recognize(context.Context, *HandwritingRequest) (*HandwritingResponse, error)
+	// Сглаживание штрихов по мере рисования: точки приходят фрагментами
+	SmoothStream(grpc.BidiStreamingServer[StrokeChunk, SmoothedChunk]) error
 	mustEmbedUnimplementedHandwritingRecognizerServer()
 }
 
@@ -65,6 +83,9 @@ type UnimplementedHandwritingRecognizerServer struct{}
 func (UnimplementedHandwritingRecognizerServer) Recognize(context.Context, *HandwritingRequest) (*HandwritingResponse, error) {
 	return nil, status.Errorf(codes.Unimplemented, "method Recognize not implemented")
 }
+func (UnimplementedHandwritingRecognizerServer) SmoothStream(grpc.BidiStreamingServer[StrokeChunk, SmoothedChunk]) error {
+	return status.Errorf(codes.Unimplemented, "method SmoothStream not implemented")
+}
 func (UnimplementedHandwritingRecognizerServer) mustEmbedUnimplementedHandwritingRecognizerServer() {}
 func (UnimplementedHandwritingRecognizerServer) testEmbeddedByValue()                               {}
 
@@ -104,6 +125,13 @@ func _HandwritingRecognizer_Recognize_Handler(srv interface{}, ctx context.Conte
 	return interceptor(ctx, in, info, handler)
 }
 
+func _HandwritingRecognizer_SmoothStream_Handler(srv interface{}, stream grpc.ServerStream) error {
+	return srv.(HandwritingRecognizerServer).SmoothStream(&grpc.GenericServerStream[StrokeChunk, SmoothedChunk]{ServerStream: stream})
+}
+
+// This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
+type HandwritingRecognizer_SmoothStreamServer = grpc.BidiStreamingServer[StrokeChunk, SmoothedChunk]
+
 // HandwritingRecognizer_ServiceDesc is the grpc.ServiceDesc for HandwritingRecognizer service.
 // It's only intended for direct use with grpc.RegisterService,
 // and not to be introspected or modified (even as a copy)
@@ -116,6 +144,13 @@ var HandwritingRecognizer_ServiceDesc = grpc.ServiceDesc{
 			Handler:    _HandwritingRecognizer_Recognize_Handler,
 		},
 	},
-	Streams:  []grpc.StreamDesc{},
+	Streams: []grpc.StreamDesc{
+		{
+			StreamName:    "SmoothStream",
+			Handler:       _HandwritingRecognizer_SmoothStream_Handler,
+			ServerStreams: true,
+			ClientStreams: true,
+		},
+	},
 	Metadata: "handwriting.proto",
 }
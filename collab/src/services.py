@@ -4,11 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 async def create_participant(db: AsyncSession, data: ParticipantIn):
-    participant = Participant(**data.dict())
-    db.add(participant)
-    await db.commit()
-    await db.refresh(participant)
-    return participant
+    return await Participant.insert_returning(db, data.dict())
 
 async def get_board_participants(db: AsyncSession, board_id):
     res = await db.execute(select(Participant).where(Participant.board_id == board_id))
@@ -41,4 +41,12 @@ class ForbiddenException(HTTPException):
         super().__init__(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=detail if detail else "Forbidden",
-        )
\ No newline at end of file
+        )
+
+class ServiceUnavailableException(HTTPException):
+    def __init__(self, detail: Any = None, retry_after: int = 1) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail if detail else "Service unavailable",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    LRU-кэш проверенных payload access-токенов в памяти процесса.
+
+    Ключ - sha256 от токена, сам токен не хранится. Запись живёт до exp токена
+    и удаляется по jti при отзыве.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._by_jti = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.revocations = 0
+        self.verifications = 0
+        self.verify_seconds = 0.0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self.key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            exp, payload, _ = entry
+            if exp <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(payload)
+
+    def put(self, token: str, payload: dict, exp: float, jti: str | None = None):
+        if self.max_entries <= 0:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (exp, dict(payload), jti)
+            if jti:
+                self._by_jti.setdefault(jti, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def revoke(self, jti: str):
+        """Удаляет все токены с данным jti (access и refresh одной пары)"""
+        with self._lock:
+            for key in self._by_jti.pop(jti, ()):
+                if self._entries.pop(key, None) is not None:
+                    self.revocations += 1
+
+    def record_verification(self, seconds: float):
+        with self._lock:
+            self.verifications += 1
+            self.verify_seconds += seconds
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_jti.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "revocations": self.revocations,
+                "verifications": self.verifications,
+                "avg_verify_ms": self.verify_seconds / self.verifications * 1000 if self.verifications else 0.0,
+            }
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        jti = entry[2]
+        keys = self._by_jti.get(jti)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_jti[jti]
+
+
+class UserProfileCache:
+    """
+    Профили пользователей (схема, не ORM-объект) с TTL в памяти процесса.
+
+    Запись сбрасывается через invalidate при изменении пользователя в этом
+    процессе; в остальных процессах она устаревает не дольше чем через ttl.
+    ttl <= 0 отключает кэш.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: str, profile):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+# Здесь, а не в deps: модели пользователей сбрасывают кэш при сохранении
+user_profile_cache = UserProfileCache(
+    ttl=float(os.getenv("USER_PROFILE_CACHE_TTL", "30")),
+    max_entries=int(os.getenv("USER_PROFILE_CACHE_MAX_ENTRIES", "10000")),
+)
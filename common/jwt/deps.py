@@ -1,34 +1,72 @@
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
-from pydantic import ValidationError
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models.users import User
-from common.jwt.jwt import decode_access_token, SUB, oauth2_scheme
+from common.jwt.cache import user_profile_cache
+from common.jwt.jwt import decode_access_token, SUB, JTI, EXP, oauth2_scheme
+from common.jwt.schemas import User as UserSchema
 from db.database import get_db
 
-# oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-
-async def get_current_user(
-        token: Annotated[str, Depends(oauth2_scheme)],
-        db: AsyncSession = Depends(get_db),
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = await decode_access_token(token, db=db)
-        expr = (User.user_uuid == payload[SUB])
-        user = await User.find_by_expr(db=db, expr=expr)
-        if user is None:
-            raise credentials_exception
-    except (JWTError, ValidationError):
-        raise credentials_exception
+
+class Principal(BaseModel):
+    """Проверенные claims access-токена, без обращения к БД"""
+    user_id: str
+    jti: str | None = None
+    exp: int | None = None
+    claims: dict = {}
+
+
+async def get_principal(token: Annotated[str, Depends(oauth2_scheme)]) -> Principal:
+    payload = await decode_access_token(token)
+    if not payload.get(SUB):
+        raise _credentials_exception()
+    return Principal(user_id=payload[SUB], jti=payload.get(JTI), exp=payload.get(EXP), claims=payload)
+
+
+CurrentPrincipal = Annotated[Principal, Depends(get_principal)]
+
+
+async def get_current_user(
+        principal: CurrentPrincipal,
+        db: AsyncSession = Depends(get_db),
+):
+    """
+    ORM-объект пользователя через кэш строк User (db.cache), без хэша пароля.
+
+    FastAPI кэширует зависимости в пределах запроса, поэтому строка
+    читается не больше одного раза на запрос.
+    """
+    user = await User.find_by_expr(db=db, expr=(User.user_uuid == principal.user_id))
+    if user is None:
+        raise _credentials_exception()
     return user
+
+
+async def get_user_profile(
+        principal: CurrentPrincipal,
+        db: AsyncSession = Depends(get_db),
+) -> UserSchema:
+    """
+    Профиль пользователя через кэш с TTL (USER_PROFILE_CACHE_TTL).
+
+    Для обработчиков, которым нужны поля профиля, а не только user_id.
+    """
+    profile = user_profile_cache.get(principal.user_id)
+    if profile is None:
+        user = await User.find_by_expr(db=db, expr=(User.user_uuid == principal.user_id))
+        if user is None:
+            raise _credentials_exception()
+        profile = UserSchema.model_validate(user)
+        user_profile_cache.put(principal.user_id, profile)
+    return profile
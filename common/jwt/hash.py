@@ -1,6 +1,20 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from common.exceptions import ServiceUnavailableException
+
+# Стоимость bcrypt; при изменении старые хэши пересчитываются при входе
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt отпускает GIL, поэтому потоки хэшируют параллельно
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Сколько операций может ждать свободный поток, сверх этого - сразу 503
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 
 def get_password_hash(password: str) -> str:
@@ -9,3 +23,72 @@ def get_password_hash(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHashPool:
+    """
+    Пул потоков для bcrypt, чтобы хэширование не блокировало event loop.
+
+    Одновременно принимается не больше workers + queue_limit операций,
+    остальные сразу отклоняются с 503 вместо ожидания в очереди.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_limit: int = PASSWORD_HASH_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise ServiceUnavailableException(detail="Too many concurrent password operations")
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            self._release(None)
+            raise
+        # Слот освобождается, когда задача завершилась в потоке, а не когда
+        # ожидающий запрос отменён: начатый bcrypt дорабатывает и занимает поток
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rounds": BCRYPT_ROUNDS,
+            }
+
+
+hash_pool = PasswordHashPool()
+
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль; второй элемент - новый хэш, если текущий
+    посчитан с другой стоимостью или устаревшей схемой
+    """
+    return await hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
@@ -1,4 +1,5 @@
 import os
+import time
 import uuid
 from datetime import timedelta, datetime, timezone
 
@@ -8,6 +9,8 @@ from fastapi import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from common.jwt.cache import TokenCache
+from common.jwt.revocation import revoked_tokens
 from common.jwt.schemas import User, TokenPair, JwtTokenSchema
 from common.exceptions import AuthFailedException
 
@@ -31,6 +34,12 @@ EXP = "exp"
 IAT = "iat"
 JTI = "jti"
 
+# Проверенные access-токены, чтобы не проверять подпись на каждом запросе
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+token_cache = TokenCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+# Отозванный jti сразу убирается из кэша проверенных токенов
+revoked_tokens.on_revoke(token_cache.revoke)
+
 
 def _create_access_token(payload: dict, minutes: int | None = None) -> JwtTokenSchema:
     expire = datetime.utcnow() + timedelta(
@@ -71,22 +80,35 @@ def create_token_pair(user: User) -> TokenPair:
     )
 
 
-async def decode_access_token(token: str, db: AsyncSession):
+async def decode_access_token(token: str, db: AsyncSession | None = None):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    started = time.perf_counter()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        # black_list_token = await BlackListToken.find_by_id(db=db, id=payload[JTI])
-        # if black_list_token:
-        #     raise JWTError("Token is blacklisted")
+        # Отзыв проверяется по списку в памяти, без запроса в БД
+        if revoked_tokens.is_revoked(payload.get(JTI)):
+            raise JWTError("Token is blacklisted")
     except JWTError as ex:
         print(str(ex))
         raise AuthFailedException()
+    finally:
+        token_cache.record_verification(time.perf_counter() - started)
 
+    # Токен без exp не кэшируем: срок жизни записи брать неоткуда
+    if EXP in payload:
+        token_cache.put(token, payload, exp=payload[EXP], jti=payload.get(JTI))
     return payload
 
 
 def refresh_token_state(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # access и refresh одной пары делят jti, после logout не обновляем
+        if revoked_tokens.is_revoked(payload.get(JTI)):
+            raise JWTError("Token is blacklisted")
     except JWTError as ex:
         print(str(ex))
         raise AuthFailedException()
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from db.database import SessionFactory
+from db.models.users import BlackListToken
+
+REVOCATION_POLL_SECONDS = float(os.getenv("REVOCATION_POLL_SECONDS", "5"))
+# Запись с created_at T может стать видна позже T (долгая транзакция),
+# поэтому каждый опрос перечитывает это окно перед прошлой отметкой
+REVOCATION_POLL_OVERLAP_SECONDS = float(os.getenv("REVOCATION_POLL_OVERLAP_SECONDS", "30"))
+# Сколько раз пробовать первичную загрузку; без неё сервис не стартует,
+# иначе отозванные до рестарта токены снова принимались бы
+REVOCATION_STARTUP_ATTEMPTS = int(os.getenv("REVOCATION_STARTUP_ATTEMPTS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationSet:
+    """
+    Отозванные jti в памяти процесса, чтобы не ходить в БД на каждый запрос.
+
+    При старте загружаются все неистёкшие записи blacklisttokens (сервис
+    не начинает принимать запросы, пока загрузка не удалась), затем
+    фоновая задача подгружает новые по created_at. Записи с прошедшим expire
+    удаляются: токен с ними всё равно не пройдёт проверку exp.
+    """
+
+    def __init__(self, poll_seconds: float = REVOCATION_POLL_SECONDS,
+                 overlap_seconds: float = REVOCATION_POLL_OVERLAP_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._revoked: dict[str, datetime] = {}
+        self._watermark: datetime | None = None
+        self._listeners = []
+        self._task: asyncio.Task | None = None
+        self.loaded = False
+
+    def add(self, jti: str, expire: datetime):
+        is_new = jti not in self._revoked
+        self._revoked[jti] = expire
+        if is_new:
+            for listener in self._listeners:
+                listener(jti)
+
+    def on_revoke(self, listener):
+        """listener(jti) вызывается для каждого нового отозванного jti"""
+        self._listeners.append(listener)
+
+    def is_revoked(self, jti: str | None) -> bool:
+        if jti is None:
+            return False
+        expire = self._revoked.get(jti)
+        if expire is None:
+            return False
+        if expire <= datetime.utcnow():
+            del self._revoked[jti]
+            return False
+        return True
+
+    def purge(self):
+        now = datetime.utcnow()
+        for jti in [jti for jti, expire in self._revoked.items() if expire <= now]:
+            del self._revoked[jti]
+
+    async def refresh(self, db):
+        """Подгружает записи, появившиеся после прошлого опроса (при первом вызове - все)"""
+        query = (
+            select(BlackListToken.id, BlackListToken.expire, BlackListToken.created_at)
+            .where(BlackListToken.expire > datetime.utcnow())
+        )
+        if self._watermark is not None:
+            query = query.where(BlackListToken.created_at > self._watermark - self.overlap)
+
+        result = await db.execute(query)
+        for jti, expire, created_at in result.all():
+            self.add(str(jti), expire)
+            if self._watermark is None or created_at > self._watermark:
+                self._watermark = created_at
+        self.purge()
+        self.loaded = True
+
+    async def _refresh(self, session_factory):
+        async with session_factory() as db:
+            await self.refresh(db)
+
+    async def _poll(self, session_factory):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self._refresh(session_factory)
+            except Exception:
+                # Опрос не должен останавливаться ни на какой ошибке
+                logger.exception("Не удалось обновить список отозванных токенов")
+
+    async def load(self, session_factory=SessionFactory, attempts: int = REVOCATION_STARTUP_ATTEMPTS):
+        """Первичная загрузка с повторами; после attempts неудач пробрасывает ошибку"""
+        for attempt in range(1, attempts + 1):
+            try:
+                await self._refresh(session_factory)
+                return
+            except Exception:
+                if attempt >= attempts:
+                    raise
+                logger.warning("Не удалось загрузить отозванные токены, попытка %d из %d",
+                               attempt, attempts, exc_info=True)
+                await asyncio.sleep(self.poll_seconds)
+
+    async def start(self, session_factory=SessionFactory):
+        """Первичная загрузка до приёма запросов, затем фоновый опрос"""
+        if self._task is None:
+            await self.load(session_factory)
+            self._task = asyncio.create_task(self._poll(session_factory))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "loaded": self.loaded,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+revoked_tokens = RevocationSet()
+
+
+@asynccontextmanager
+async def revocation_lifespan(app):
+    """lifespan для FastAPI: держит список отозванных токенов в актуальном состоянии"""
+    await revoked_tokens.start()
+    try:
+        yield
+    finally:
+        await revoked_tokens.stop()
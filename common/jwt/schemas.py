@@ -104,6 +104,36 @@ class Team(BaseModel):
     pool: int = 2
     created_at: datetime = Field(serialization_alias="createdAt", validation_alias="created_at", default=datetime.now())
 
+class TeamSummary(BaseModel):
+    id: uuid.UUID
+    name: str
+    description: str | None = None
+    pool: int
+    status: str
+    member_count: int = Field(serialization_alias="memberCount")
+    created_at: datetime = Field(serialization_alias="createdAt")
+    updated_at: datetime = Field(serialization_alias="updatedAt")
+
+
+class TeamPage(BaseModel):
+    items: list[TeamSummary]
+    next_cursor: str | None = Field(default=None, serialization_alias="nextCursor")
+
+
+class TeamMember(BaseModel):
+    id: uuid.UUID
+    email: str
+    firstname: str | None = None
+    lastname: str | None = None
+    status: str
+    joined_at: datetime = Field(serialization_alias="joinedAt")
+
+
+class TeamMemberPage(BaseModel):
+    items: list[TeamMember]
+    next_cursor: str | None = Field(default=None, serialization_alias="nextCursor")
+
+
 class TeamCreate(BaseModel):
     name: str
     description: str | None = None
@@ -112,6 +142,15 @@ class TeamCreate(BaseModel):
 class InviteUser(BaseModel):
     email: str
 
+class BulkInviteUsers(BaseModel):
+    emails: list[str]
+
+
+class BulkInviteResult(BaseModel):
+    invited: list[str]
+    already_member: list[str] = Field(serialization_alias="alreadyMember")
+    unknown: list[str]
+
 class UpdateInviteStatus(BaseModel):
-    team_id: int
+    team_id: uuid.UUID
     status: Literal["accepted", "rejected"]
\ No newline at end of file
@@ -0,0 +1,46 @@
+import hmac
+import ipaddress
+import os
+
+from fastapi import APIRouter, Depends, Header, Request
+
+from common.exceptions import ForbiddenException
+from common.jwt.jwt import token_cache
+from common.jwt.cache import user_profile_cache
+from common.jwt.revocation import revoked_tokens
+from common.jwt.hash import hash_pool
+from db.database import pool_stats
+from db.cache import entity_cache
+
+# Токен для /internal/*; без него эндпоинты доступны только с loopback
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "")
+
+
+def require_internal_access(request: Request, x_internal_token: str | None = Header(default=None)):
+    if INTERNAL_TOKEN:
+        if x_internal_token is None or not hmac.compare_digest(x_internal_token, INTERNAL_TOKEN):
+            raise ForbiddenException()
+        return
+    host = request.client.host if request.client else ""
+    try:
+        if ipaddress.ip_address(host).is_loopback:
+            return
+    except ValueError:
+        pass
+    raise ForbiddenException()
+
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_internal_access)])
+
+
+@router.get("/stats")
+async def stats():
+    """Счётчики кэшей процесса и снимок пула соединений с БД"""
+    return {
+        "token_cache": token_cache.stats(),
+        "revoked_tokens": revoked_tokens.stats(),
+        "password_hash": hash_pool.stats(),
+        "user_profile_cache": user_profile_cache.stats(),
+        "db_pool": pool_stats(),
+        "entity_cache": entity_cache.stats(),
+    }
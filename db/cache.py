@@ -0,0 +1,232 @@
+"""
+Read-through кэш строк для Base.find_by_id и Base.find_by_expr.
+
+Модель включает кэш атрибутом __cache_ttl__ (секунды). В кэше лежат
+значения колонок, а не ORM-объекты: при попадании объект собирается заново
+и присоединяется к сессии через merge(load=False), без SELECT.
+
+Все ключи класса содержат его поколение, которое увеличивается после
+save, delete и bulk-записей. Поэтому чтение, начатое до записи, кладёт
+старую строку под старым поколением, и её больше никто не прочитает.
+Колонки из __cache_exclude__ (пароль пользователя) в кэш не пишутся:
+у объекта из кэша они не загружены, и читать их нужно запросом к БД.
+Записи в обход методов Base (update()/delete() напрямую) кэш не видит -
+такие модели включать не стоит.
+
+Сервисы работают в разных процессах, поэтому в общем развёртывании нужен
+DB_CACHE_BACKEND=redis: локальный бэкенд не узнает о записях другого
+сервиса и отдаёт старую строку до истечения TTL.
+"""
+import enum
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+
+from db.config import settings
+
+
+class LocalCacheBackend:
+    """LRU с TTL в памяти процесса; заменяет общий бэкенд в разработке и тестах"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Счётчики поколений хранятся отдельно и не вытесняются по LRU
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def get_many(self, keys: list[str]) -> list:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _json_default(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class RedisCacheBackend:
+    """Общий кэш для нескольких процессов; нужен пакет redis"""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as ex:
+            raise RuntimeError("DB_CACHE_BACKEND=redis requires the redis package") from ex
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._redis.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def get_many(self, keys: list[str]) -> list:
+        if not keys:
+            return []
+        return [json.loads(raw) if raw is not None else None for raw in await self._redis.mget(keys)]
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        raw = json.dumps(value, default=_json_default)
+        await self._redis.set(key, raw, px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+
+def _coerce(column, value):
+    """Значение из бэкенда обратно в тип колонки (после JSON это строки)"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type):
+        return value
+    if issubclass(python_type, enum.Enum):
+        return python_type(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return value
+
+
+class EntityCache:
+    """Ключи, (де)сериализация строк, сброс и счётчики попаданий по моделям"""
+
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled_for(cls) -> bool:
+        return bool(getattr(cls, "__cache_ttl__", None))
+
+    def _count(self, cls, name: str):
+        with self._lock:
+            counters = self._stats.setdefault(cls.__name__, {"hits": 0, "misses": 0, "invalidations": 0})
+            counters[name] += 1
+
+    @staticmethod
+    def _namespace(cls) -> str:
+        return f"entity:{cls.__tablename__}"
+
+    async def _generation(self, cls) -> int:
+        return int(await self.backend.get(f"{self._namespace(cls)}:generation") or 0)
+
+    async def id_key(self, cls, id) -> str:
+        generation = await self._generation(cls)
+        return f"{self._namespace(cls)}:{generation}:id:{id}"
+
+    async def expr_key(self, cls, expr) -> str:
+        compiled = expr.compile()
+        params = sorted((name, str(value)) for name, value in compiled.params.items())
+        digest = hashlib.sha256(f"{compiled}|{params}".encode()).hexdigest()
+        generation = await self._generation(cls)
+        return f"{self._namespace(cls)}:{generation}:expr:{digest}"
+
+    @staticmethod
+    def _cached_attrs(cls):
+        exclude = getattr(cls, "__cache_exclude__", ())
+        return [attr for attr in cls.__mapper__.column_attrs if attr.key not in exclude]
+
+    @classmethod
+    def dump(cls, obj) -> dict:
+        return {attr.key: getattr(obj, attr.key) for attr in cls._cached_attrs(type(obj))}
+
+    @classmethod
+    def load(cls, model, values: dict):
+        columns = model.__table__.c
+        return model(**{
+            attr.key: _coerce(columns[attr.columns[0].name], values.get(attr.key))
+            for attr in cls._cached_attrs(model)
+        })
+
+    async def get(self, cls, key: str):
+        values = await self.backend.get(key)
+        self._count(cls, "hits" if values is not None else "misses")
+        return values
+
+    async def put(self, cls, key: str, obj):
+        await self.backend.set(key, self.dump(obj), cls.__cache_ttl__)
+
+    async def invalidate(self, cls):
+        """Сбрасывает все записи класса сменой поколения; старые вытесняются по LRU или TTL"""
+        if not self.enabled or not self.enabled_for(cls):
+            return
+        await self.backend.incr(f"{self._namespace(cls)}:generation")
+        self._count(cls, "invalidations")
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_class = {name: dict(counters) for name, counters in self._stats.items()}
+        for counters in by_class.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_ratio"] = counters["hits"] / lookups if lookups else 0.0
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "models": by_class,
+        }
+
+
+def _make_backend():
+    if settings.DB_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.DB_CACHE_REDIS_URL)
+    return LocalCacheBackend(max_entries=settings.DB_CACHE_MAX_ENTRIES)
+
+
+entity_cache = EntityCache(_make_backend(), enabled=settings.DB_CACHE_ENABLED)
@@ -9,6 +9,22 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = Field(default="postgres")
     POSTGRES_PORT: str = Field(default="5432")
 
+    # Пул соединений; задаётся отдельно для каждого сервиса через окружение
+    DB_POOL_SIZE: int = Field(default=5)
+    DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_TIMEOUT: float = Field(default=30.0)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    # Кэш подготовленных выражений asyncpg; 0 - для pgbouncer в режиме transaction
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100)
+    DB_ECHO: bool = Field(default=False)
+
+    # Read-through кэш строк моделей с __cache_ttl__ (db.cache)
+    DB_CACHE_ENABLED: bool = Field(default=True)
+    DB_CACHE_BACKEND: str = Field(default="local")
+    DB_CACHE_MAX_ENTRIES: int = Field(default=10000)
+    DB_CACHE_REDIS_URL: str = Field(default="redis://redis:6379/0")
+
     @property
     def POSTGRES_URL(self):
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_NAME}"
@@ -1,4 +1,7 @@
-from sqlalchemy import select, MetaData
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select, insert, delete, MetaData, make_url
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
@@ -6,12 +9,23 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
 )
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, make_transient_to_detached
+from db.cache import entity_cache
 from db.config import settings
+from db.lib.types import utcnow
 
 engine = create_async_engine(
-    url=settings.POSTGRES_URL,
-    echo=True
+    # prepared_statement_cache_size - кэш адаптера SQLAlchemy, statement_cache_size - самого asyncpg
+    url=make_url(settings.POSTGRES_URL).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    ),
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
 )
 
 SessionFactory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
@@ -19,7 +33,68 @@ SessionFactory = async_sessionmaker(engine, autoflush=False, expire_on_commit=Fa
 metadata = MetaData()
 
 
+UNIT_OF_WORK = "unit_of_work"
+PENDING_INVALIDATIONS = "pending_invalidations"
+
+
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession):
+    """
+    Одна транзакция на несколько записей.
+
+    Внутри контекста save, delete и bulk-методы только отправляют изменения
+    (flush), коммит один - при выходе, при исключении всё откатывается.
+    Вложенный unit_of_work присоединяется к внешнему.
+    """
+    if db.info.get(UNIT_OF_WORK):
+        yield db
+        return
+    db.info[UNIT_OF_WORK] = True
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(UNIT_OF_WORK, None)
+        pending = db.info.pop(PENDING_INVALIDATIONS, set())
+    # Кэш сбрасываем после коммита, иначе параллельное чтение вернёт в него старые строки
+    for cls in pending:
+        await _drop_cached(cls)
+
+
+async def _commit(db: AsyncSession):
+    """Коммит вне unit_of_work, внутри - только flush"""
+    if db.info.get(UNIT_OF_WORK):
+        await db.flush()
+    else:
+        await db.commit()
+
+
+async def _drop_cached(cls):
+    """Транзакция уже закоммичена: ошибка бэкенда кэша не должна выглядеть как сбой записи"""
+    try:
+        await entity_cache.invalidate(cls)
+    except Exception as ex:
+        print(f"Не удалось сбросить кэш {cls.__name__}: {ex}")
+
+
+async def _invalidate(db: AsyncSession, cls):
+    """Сброс кэша строк после записи; внутри unit_of_work - после его коммита"""
+    if not entity_cache.enabled_for(cls):
+        return
+    if db.info.get(UNIT_OF_WORK):
+        db.info.setdefault(PENDING_INVALIDATIONS, set()).add(cls)
+    else:
+        await _drop_cached(cls)
+
+
 class Base(AsyncAttrs, DeclarativeBase):
+    # Секунды жизни строк модели в кэше find_by_id/find_by_expr; None - без кэша
+    __cache_ttl__: float | None = None
+    # Колонки, которые не попадают в кэш; при попадании они остаются не загружены
+    __cache_exclude__: frozenset[str] = frozenset()
 
     async def save(self, db: AsyncSession):
         """
@@ -28,10 +103,11 @@ class Base(AsyncAttrs, DeclarativeBase):
         """
         try:
             db.add(self)
-            await db.commit()
-            return self
+            await _commit(db)
         except SQLAlchemyError as ex:
             raise Exception(ex)
+        await _invalidate(db, type(self))
+        return self
 
     async def delete(self, db: AsyncSession):
         """
@@ -40,10 +116,98 @@ class Base(AsyncAttrs, DeclarativeBase):
         """
         try:
             await db.delete(self)
-            await db.commit()
-            return self
+            await _commit(db)
+        except SQLAlchemyError as ex:
+            raise Exception(ex)
+        await _invalidate(db, type(self))
+        return self
+
+    @classmethod
+    async def save_all(cls, db: AsyncSession, objects: list):
+        """
+        Сохраняет объекты одной транзакцией; однотипные новые строки
+        SQLAlchemy отправляет одним INSERT
+        """
+        try:
+            db.add_all(objects)
+            await _commit(db)
+        except SQLAlchemyError as ex:
+            raise Exception(ex)
+        for obj_cls in {type(obj) for obj in objects}:
+            await _invalidate(db, obj_cls)
+        return objects
+
+    @classmethod
+    async def insert_returning(cls, db: AsyncSession, values: dict | list[dict]):
+        """
+        INSERT ... RETURNING: объекты сразу с серверными значениями
+        (created_at и т.п.), без отдельного refresh
+        """
+        rows = [values] if isinstance(values, dict) else values
+        if not rows:
+            return []
+        try:
+            result = await db.scalars(insert(cls).returning(cls), rows)
+            objects = result.all()
+            await _commit(db)
         except SQLAlchemyError as ex:
             raise Exception(ex)
+        # Новые строки могут поменять результат find_by_expr
+        await _invalidate(db, cls)
+        return objects[0] if isinstance(values, dict) else objects
+
+    @classmethod
+    async def bulk_upsert(cls, db: AsyncSession, rows: list[dict], index_elements: list[str],
+                          update_fields: list[str] | None = None, returning: bool = False):
+        """
+        INSERT ... ON CONFLICT (index_elements) одним запросом.
+
+        update_fields=None обновляет все переданные поля кроме ключа,
+        пустой список - ON CONFLICT DO NOTHING. С returning=True возвращает
+        вставленные и обновлённые объекты, иначе число затронутых строк.
+        """
+        if not rows:
+            return [] if returning else 0
+        stmt = pg_insert(cls).values(rows)
+        if update_fields is None:
+            update_fields = [name for name in rows[0] if name not in index_elements]
+        if update_fields:
+            set_ = {name: stmt.excluded[name] for name in update_fields}
+            if "updated_at" in cls.__table__.c and "updated_at" not in set_:
+                set_["updated_at"] = utcnow()
+            stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        try:
+            if returning:
+                result = await db.scalars(
+                    stmt.returning(cls), execution_options={"populate_existing": True}
+                )
+                objects = result.all()
+            else:
+                result = await db.execute(stmt)
+                objects = result.rowcount
+            await _commit(db)
+        except SQLAlchemyError as ex:
+            raise Exception(ex)
+        await _invalidate(db, cls)
+        return objects
+
+    @classmethod
+    async def bulk_delete_by_ids(cls, db: AsyncSession, ids: list) -> int:
+        """DELETE ... WHERE pk IN (...) одним запросом, возвращает число удалённых строк"""
+        if not ids:
+            return 0
+        pk = cls.__mapper__.primary_key[0]
+        try:
+            result = await db.execute(
+                delete(cls).where(pk.in_(ids)), execution_options={"synchronize_session": False}
+            )
+            await _commit(db)
+        except SQLAlchemyError as ex:
+            raise Exception(ex)
+        await _invalidate(db, cls)
+        return result.rowcount
 
     async def is_exists(self, db: AsyncSession):
         """
@@ -53,15 +217,39 @@ class Base(AsyncAttrs, DeclarativeBase):
 
     @classmethod
     async def find_by_id(cls, db: AsyncSession, id: str):
-        query = select(cls).where(cls.id == id)
-        result = await db.execute(query)
-        return result.scalars().first()
+        pk = cls.__mapper__.primary_key[0]
+        if not cls._cached():
+            query = select(cls).where(pk == id)
+            result = await db.execute(query)
+            return result.scalars().first()
+        return await cls._read_through(db, await entity_cache.id_key(cls, id), pk == id)
 
     @classmethod
     async def find_by_expr(cls, db: AsyncSession, expr):
-        query = select(cls).where(expr)
-        result = await db.execute(query)
-        return result.scalars().first()
+        if not cls._cached():
+            query = select(cls).where(expr)
+            result = await db.execute(query)
+            return result.scalars().first()
+        return await cls._read_through(db, await entity_cache.expr_key(cls, expr), expr)
+
+    @classmethod
+    def _cached(cls) -> bool:
+        return entity_cache.enabled and entity_cache.enabled_for(cls)
+
+    @classmethod
+    async def _read_through(cls, db: AsyncSession, key: str, expr):
+        values = await entity_cache.get(cls, key)
+        if values is not None:
+            # Объект из кэша присоединяется к сессии без SELECT
+            obj = entity_cache.load(cls, values)
+            make_transient_to_detached(obj)
+            return await db.merge(obj, load=False)
+        result = await db.execute(select(cls).where(expr))
+        obj = result.scalars().first()
+        # Отсутствие строки не кэшируем, чтобы новая строка была видна сразу
+        if obj is not None:
+            await entity_cache.put(cls, key, obj)
+        return obj
 
     @classmethod
     async def select_all(cls, db: AsyncSession):
@@ -78,6 +266,19 @@ class Base(AsyncAttrs, DeclarativeBase):
 
 
 
+def pool_stats() -> dict:
+    """Снимок пула соединений: занятые, свободные и сверх pool_size"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
 async def get_db():
     async with SessionFactory() as db:
         yield db
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import Enum, UniqueConstraint, ForeignKey
-from uuid import UUID
+from uuid import UUID, uuid4
 from db.lib.mixins import TimeMixin
 from db.database import Base
 import enum
@@ -18,7 +18,7 @@ class Participant(Base, TimeMixin):
     __tablename__ = "board_participant"
     __table_args__ = (UniqueConstraint("board_id", "user_id"), )
 
-    id: Mapped[UUID] = mapped_column(primary_key=True)
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     board_id: Mapped[UUID] = mapped_column(ForeignKey(Board.id))
     user_id: Mapped[UUID] = mapped_column(ForeignKey(User.user_uuid))
     role: Mapped[Role] = mapped_column(Enum(Role), default=Role.viewer)
\ No newline at end of file
@@ -6,9 +6,10 @@ from sqlalchemy import Enum as SqlEnum
 
 from db.database import Base
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, select, UniqueConstraint
+from sqlalchemy import String, select, UniqueConstraint, Index
 
-from common.jwt.hash import verify_password
+from common.jwt.hash import verify_and_update_password
+from common.jwt.cache import user_profile_cache
 from db.lib.mixins import TimeMixin
 from db.lib.types import pk_id, utcnow
 
@@ -18,6 +19,9 @@ from db.lib.types import pk_id, utcnow
 
 class User(Base, TimeMixin):
     __tablename__ = "user"
+    __cache_ttl__ = 60
+    # Хэш пароля не должен лежать в общем кэше; authenticate читает его из БД
+    __cache_exclude__ = frozenset({"password"})
     user_uuid: Mapped[pk_id]
     email: Mapped[str] = mapped_column(String(255), unique=True)
     phone: Mapped[str] = mapped_column(String(255), nullable=True)
@@ -28,6 +32,17 @@ class User(Base, TimeMixin):
     is_active: Mapped[bool] = mapped_column(default=True)
 
 
+    async def save(self, db: AsyncSession):
+        user = await super().save(db=db)
+        user_profile_cache.invalidate(str(self.user_uuid))
+        return user
+
+    async def delete(self, db: AsyncSession):
+        user = await super().delete(db=db)
+        user_profile_cache.invalidate(str(self.user_uuid))
+        return user
+
+
     @classmethod
     async def find_by_email(cls, db: AsyncSession, email: str):
         query = select(cls).where(cls.email == email)
@@ -38,8 +53,15 @@ class User(Base, TimeMixin):
     @classmethod
     async def authenticate(cls, db: AsyncSession, email: str, password: str):
         user = await cls.find_by_email(db=db, email=email)
-        if not user or not verify_password(password, user.password):
+        if not user:
+            return False
+        verified, new_hash = await verify_and_update_password(password, user.password)
+        if not verified:
             return False
+        if new_hash:
+            # Стоимость bcrypt поменялась - сохраняем хэш с текущей
+            user.password = new_hash
+            await user.save(db=db)
         return user
 
 
@@ -47,7 +69,7 @@ class BlackListToken(Base):
     __tablename__ = "blacklisttokens"
     id: Mapped[pk_id]
     expire: Mapped[datetime]
-    created_at: Mapped[datetime] = mapped_column(server_default=utcnow())
+    created_at: Mapped[datetime] = mapped_column(server_default=utcnow(), index=True)
 
 
 class Teams(Base, TimeMixin):
@@ -57,6 +79,9 @@ class Teams(Base, TimeMixin):
     name: Mapped[str] = mapped_column(unique=True)
     description: Mapped[str]  = mapped_column(nullable=True)
 
+    # Keyset-пагинация списка команд по (created_at, id)
+    __table_args__ = (Index("ix_teams_created_at_id", "created_at", "id"),)
+
 class InviteStatus(enum.Enum):
     invited = "invited"
     accepted = "accepted"
@@ -72,5 +97,9 @@ class UserTeams(Base, TimeMixin):
     status: Mapped[InviteStatus] = mapped_column(SqlEnum(InviteStatus), default=InviteStatus.invited)
 
 
-    __table_args__ = (UniqueConstraint("user_id", "team_id"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "team_id"),
+        # Keyset-пагинация участников команды
+        Index("ix_user_teams_team_id_created_at_id", "team_id", "created_at", "id"),
+    )
     
\ No newline at end of file
@@ -0,0 +1,86 @@
+import threading
+from contextlib import contextmanager
+
+
+class AdmissionError(Exception):
+    """Лимит одновременных запросов ключа (доски или пользователя) исчерпан"""
+
+
+class DeadlineError(Exception):
+    """Запрос не успеет выполниться до дедлайна клиента"""
+
+
+class RequestCancelledError(Exception):
+    """Клиент отменил запрос или отключился, продолжать работу незачем"""
+
+
+class CostModel:
+    """Оценка времени инференса по числу точек
+
+    Секунды на точку усредняются экспоненциально по фактическим вызовам
+    бэкенда, поэтому оценка следует за бэкендом, числом потоков и нагрузкой.
+    До первого замера оценка нулевая и запросы по ней не отклоняются.
+    """
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.seconds_per_point = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, points, seconds):
+        if points <= 0:
+            return
+        sample = seconds / points
+        with self._lock:
+            if self.seconds_per_point == 0.0:
+                self.seconds_per_point = sample
+            else:
+                self.seconds_per_point += self.alpha * (sample - self.seconds_per_point)
+
+    def estimate(self, points):
+        return points * self.seconds_per_point
+
+
+class AdmissionController:
+    """Лимиты одновременных запросов и точек в обработке на один ключ
+
+    Ключ - доска или пользователь запроса, так что одна шумная доска
+    упирается в свой лимит и не вытесняет остальные. 0 отключает лимит.
+    """
+
+    def __init__(self, max_requests=0, max_points=0):
+        self.max_requests = max_requests
+        self.max_points = max_points
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def admit(self, key, points):
+        with self._lock:
+            requests, inflight_points = self._inflight.get(key, (0, 0))
+            if self.max_requests and requests >= self.max_requests:
+                raise AdmissionError(f"Превышен лимит одновременных запросов для {key} ({self.max_requests})")
+            # Один запрос крупнее лимита всё равно пропускаем, если ключ свободен
+            if self.max_points and requests and inflight_points + points > self.max_points:
+                raise AdmissionError(f"Превышен лимит точек в обработке для {key} ({self.max_points})")
+            self._inflight[key] = (requests + 1, inflight_points + points)
+        try:
+            yield
+        finally:
+            with self._lock:
+                requests, inflight_points = self._inflight[key]
+                if requests <= 1:
+                    del self._inflight[key]
+                else:
+                    self._inflight[key] = (requests - 1, inflight_points - points)
+
+    def inflight(self):
+        with self._lock:
+            return dict(self._inflight)
+
+
+def admission_key(request, key_field):
+    """Ключ допуска: board_id или user_id первого события запроса"""
+    if not request.events:
+        return ''
+    return getattr(request.events[0], key_field, '')
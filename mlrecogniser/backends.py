@@ -0,0 +1,103 @@
+import copy
+import io
+
+import numpy as np
+import torch
+
+# eager - обычный nn.Module, torchscript - замороженный TorchScript без dropout,
+# onnx - ONNX Runtime, int8 - статически квантованная модель (FX, x86/fbgemm)
+BACKENDS = ('eager', 'torchscript', 'onnx', 'int8')
+
+
+def example_inputs(batch=4, points=64):
+    x = torch.rand(batch, points, 2)
+    mask = torch.ones(batch, points, 1)
+    return x, mask
+
+
+def calibration_batches(num_batches=16, batch=16, seed=0):
+    """Нормализованные случайные траектории для калибровки квантования"""
+    rng = np.random.default_rng(seed)
+    batches = []
+    for _ in range(num_batches):
+        points = int(rng.integers(10, 200))
+        walk = np.cumsum(rng.normal(size=(batch, points, 2)), axis=1)
+        lo = walk.min(axis=1, keepdims=True)
+        span = walk.max(axis=1, keepdims=True) - lo
+        x = torch.from_numpy(((walk - lo) / (span + 1e-8)).astype(np.float32))
+        batches.append((x, torch.ones(batch, points, 1)))
+    return batches
+
+
+def to_torchscript(model):
+    """Замороженный TorchScript: веса становятся константами, dropout удаляется"""
+    model.eval()
+    return torch.jit.freeze(torch.jit.script(model))
+
+
+def to_int8(model, calibration=None):
+    """Статическая int8-квантизация: conv+relu сливаются, масштабы калибруются на синтетике"""
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    model = copy.deepcopy(model).cpu().eval()
+    x, mask = example_inputs()
+    prepared = prepare_fx(model, get_default_qconfig_mapping('x86'), example_inputs=(x, mask))
+    with torch.no_grad():
+        for batch, batch_mask in calibration or calibration_batches():
+            prepared(batch, batch_mask)
+    quantized = convert_fx(prepared)
+    return torch.jit.freeze(torch.jit.trace(quantized, (x, mask)))
+
+
+def to_onnx(model):
+    """ONNX-граф с динамическими размерами батча и длины траектории"""
+    model = copy.deepcopy(model).cpu().eval()
+    buffer = io.BytesIO()
+    dynamic = {0: 'batch', 1: 'points'}
+    torch.onnx.export(
+        model,
+        example_inputs(),
+        buffer,
+        input_names=['x', 'mask'],
+        output_names=['smoothed'],
+        dynamic_axes={'x': dynamic, 'mask': dynamic, 'smoothed': dynamic},
+        dynamo=False,
+    )
+    return buffer.getvalue()
+
+
+class OnnxRunner:
+    """Запуск ONNX-модели через onnxruntime с тем же интерфейсом, что у модели torch"""
+
+    def __init__(self, onnx_model, num_threads=0):
+        try:
+            import onnxruntime
+        except ImportError as ex:
+            raise RuntimeError("Для INFERENCE_BACKEND=onnx установите onnxruntime") from ex
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            onnx_model, options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, x, mask):
+        outputs = self.session.run(None, {
+            'x': x.cpu().numpy(),
+            'mask': mask.cpu().numpy(),
+        })
+        return torch.from_numpy(outputs[0])
+
+
+def build_runner(model, backend):
+    """Вызываемый объект runner(x, mask) для выбранного бэкенда инференса"""
+    if backend == 'eager':
+        return model
+    if backend == 'torchscript':
+        return to_torchscript(model)
+    if backend == 'int8':
+        return to_int8(model)
+    if backend == 'onnx':
+        return OnnxRunner(to_onnx(model), num_threads=torch.get_num_threads())
+    raise ValueError(f"Неизвестный бэкенд инференса {backend}, доступны: {', '.join(BACKENDS)}")
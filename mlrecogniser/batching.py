@@ -0,0 +1,193 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Очередь планировщика заполнена, запрос нужно отклонить"""
+
+
+class BatcherStoppedError(RuntimeError):
+    """Планировщик остановлен и запросы больше не принимает"""
+
+
+class _Job:
+    __slots__ = ("strokes", "future", "enqueued_at")
+
+    def __init__(self, strokes):
+        self.strokes = strokes
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Собирает траектории из параллельных запросов в микробатчи
+
+    Все вызовы модели выполняются в одном выделенном потоке инференса, поэтому
+    потоки gRPC не конкурируют за ядра. Батч закрывается, когда в нём набралось
+    max_batch_size траекторий или с момента прихода первого запроса прошло
+    max_wait_ms миллисекунд. Запрос целиком попадает в один батч, его
+    траектории не разделяются.
+    """
+
+    def __init__(self, smooth_fn, max_batch_size=64, max_wait_ms=5.0, queue_depth=256,
+                 stats_log_interval=0.0, queue_wait_metric=QUEUE_WAIT):
+        self.smooth_fn = smooth_fn
+        self.queue_wait_metric = queue_wait_metric
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.queue_depth = queue_depth
+        self.stats_log_interval = stats_log_interval
+
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._jobs = 0
+        self._strokes = 0
+        self._rejected = 0
+        self._last_batch_size = 0
+        self._queue_wait_total = 0.0
+        self._inference_time_total = 0.0
+        self._thread = None
+        # Под этой блокировкой submit проверяет флаг и ставит задачу, а stop - поднимает флаг,
+        # поэтому после _STOP в очередь ничего не попадает
+        self._state_lock = threading.Lock()
+        self._stopped = False
+
+    def start(self):
+        if self._thread is None:
+            with self._state_lock:
+                self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="inference", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        with self._state_lock:
+            self._stopped = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, strokes):
+        """Ставит траектории в очередь и возвращает Future со списком результатов"""
+        job = _Job(list(strokes))
+        with self._state_lock:
+            if self._stopped:
+                raise BatcherStoppedError("Планировщик инференса остановлен")
+            if not job.strokes:
+                job.future.set_result([])
+                return job.future
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                with self._stats_lock:
+                    self._rejected += 1
+                raise QueueFullError(f"Очередь инференса заполнена ({self.queue_depth})")
+        return job.future
+
+    def stats(self):
+        """Снимок счётчиков планировщика"""
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                "queue_size": self._queue.qsize(),
+                "queue_depth": self.queue_depth,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": batches,
+                "jobs": self._jobs,
+                "strokes": self._strokes,
+                "rejected": self._rejected,
+                "last_batch_size": self._last_batch_size,
+                "avg_batch_size": self._strokes / batches if batches else 0.0,
+                "avg_queue_wait_ms": self._queue_wait_total / self._jobs * 1000.0 if self._jobs else 0.0,
+                "avg_inference_ms": self._inference_time_total / batches * 1000.0 if batches else 0.0,
+            }
+
+    def _collect(self, first):
+        """Добирает запросы в батч до лимита размера или времени ожидания"""
+        jobs = [first]
+        size = len(first.strokes)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return jobs, True
+            jobs.append(job)
+            size += len(job.strokes)
+        return jobs, False
+
+    def _run(self):
+        last_log = time.monotonic()
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            jobs, stopping = self._collect(first)
+            self._process(jobs)
+
+            if self.stats_log_interval and time.monotonic() - last_log >= self.stats_log_interval:
+                last_log = time.monotonic()
+                logger.info("Статистика планировщика инференса", extra=self.stats())
+        self._drain()
+
+    def _drain(self):
+        """Завершает ошибкой задачи, оставшиеся в очереди после остановки"""
+        error = BatcherStoppedError("Планировщик инференса остановлен")
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not _STOP and job.future.set_running_or_notify_cancel():
+                job.future.set_exception(error)
+
+    def _process(self, jobs):
+        # Запросы, отменённые пока они ждали в очереди, в батч не попадают
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+
+        started = time.monotonic()
+        if self.queue_wait_metric is not None:
+            for job in jobs:
+                self.queue_wait_metric.observe(started - job.enqueued_at)
+        strokes = [stroke for job in jobs for stroke in job.strokes]
+        try:
+            results = self.smooth_fn(strokes)
+        except Exception as ex:
+            for job in jobs:
+                job.future.set_exception(ex)
+            return
+        finished = time.monotonic()
+
+        offset = 0
+        for job in jobs:
+            job.future.set_result(results[offset:offset + len(job.strokes)])
+            offset += len(job.strokes)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._jobs += len(jobs)
+            self._strokes += len(strokes)
+            self._last_batch_size = len(strokes)
+            self._queue_wait_total += sum(started - job.enqueued_at for job in jobs)
+            self._inference_time_total += finished - started
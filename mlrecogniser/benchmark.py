@@ -0,0 +1,273 @@
+"""Бенчмарк задержки и пропускной способности сглаживания траекторий
+
+    python benchmark.py --scenarios smooth recognize grpc --concurrency 1 4 16 --json bench.json
+    python benchmark.py --scenarios grpc --target localhost:50051 --packed
+
+Сценарии: smooth - TrajectoryProcessor.smooth_trajectory по одному штриху
+(smooth_arrays при --packed),
+recognize - Recognize сервиса в этом процессе, grpc - полный вызов через
+gRPC (поднимается локальный сервер, если не указан --target).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent import futures
+
+import grpc
+import numpy as np
+import torch
+
+import handwriting_pb2
+import handwriting_pb2_grpc
+from config import settings
+from handwriting_service import HandwritingRecognizerServicer, server_options
+from trajectory_smoother import array_to_packed, array_to_points, get_trajectory_processor, stroke_to_array
+from train import synthetic_trajectory
+
+SCENARIOS = ('smooth', 'recognize', 'grpc')
+
+
+def make_stroke(rng, length, scale=40.0):
+    """Синтетический штрих в координатах холста на основе траекторий обучения"""
+    clean = synthetic_trajectory(rng, length)['clean']
+    origin = rng.uniform(0.0, 1000.0, size=2)
+    return clean * scale + origin
+
+
+def make_requests(num_requests, min_strokes, max_strokes, min_points, max_points, packed=False, seed=0):
+    """Корпус HandwritingRequest с разным числом штрихов и точек в штрихе"""
+    rng = np.random.default_rng(seed)
+    requests = []
+    for r in range(num_requests):
+        events = []
+        for s in range(int(rng.integers(min_strokes, max_strokes + 1))):
+            coords = make_stroke(rng, int(rng.integers(min_points, max_points + 1)))
+            payload = handwriting_pb2.DrawPayload(color='#000000', thickness=2)
+            if packed:
+                payload.packed_points = array_to_packed(coords)
+            else:
+                payload.points.extend(array_to_points(coords))
+            events.append(handwriting_pb2.DrawEvent(
+                type='draw',
+                user_id=f'user-{r % 16}',
+                board_id=f'board-{r % 4}',
+                payload=payload,
+                timestamp=1_700_000_000_000 + r,
+            ))
+        requests.append(handwriting_pb2.HandwritingRequest(events=events))
+    return requests
+
+
+def percentiles(latencies_ms):
+    values = np.asarray(latencies_ms)
+    return {
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'mean_ms': float(values.mean()),
+        'max_ms': float(values.max()),
+    }
+
+
+def run_load(call, items, concurrency):
+    """Прогоняет items через call в concurrency потоках; возвращает задержки, ошибки и время"""
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            call(item)
+            return (time.perf_counter() - started) * 1000.0, None
+        except Exception as ex:
+            return (time.perf_counter() - started) * 1000.0, type(ex).__name__
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, items))
+    wall = time.perf_counter() - started
+
+    errors = {}
+    for _, error in outcomes:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    return [latency for latency, error in outcomes if error is None], errors, wall
+
+
+def scenario_items(scenario, requests, packed=False):
+    """Единица работы сценария и число штрихов в ней"""
+    if scenario == 'smooth':
+        # При --packed points пуст, штрих берётся из packed_points массивом
+        convert = stroke_to_array if packed else (lambda payload: payload.points)
+        strokes = [convert(event.payload) for request in requests for event in request.events]
+        return strokes, [1] * len(strokes)
+    return requests, [len(request.events) for request in requests]
+
+
+def measure(scenario, call, requests, concurrency, warmup, packed=False):
+    items, stroke_counts = scenario_items(scenario, requests, packed)
+    for item in items[:warmup]:
+        call(item)
+
+    latencies, errors, wall = run_load(call, items, concurrency)
+    row = {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'calls': len(items),
+        'strokes': sum(stroke_counts),
+        'errors': errors,
+        'wall_seconds': wall,
+        'calls_per_sec': len(items) / wall if wall else 0.0,
+        'strokes_per_sec': sum(stroke_counts) / wall if wall else 0.0,
+    }
+    if latencies:
+        row.update(percentiles(latencies))
+    return row
+
+
+def start_local_server(servicer):
+    """Синхронный gRPC-сервер на свободном порту с настройками из config"""
+    options, compression = server_options()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=settings.GRPC_MAX_WORKERS),
+        options=options,
+        compression=compression,
+    )
+    handwriting_pb2_grpc.add_HandwritingRecognizerServicer_to_server(servicer, server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    return server, f'127.0.0.1:{port}'
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(model_version):
+    """Параметры прогона, от которых зависят результаты"""
+    return {
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'cpu_count': os.cpu_count(),
+        'model_version': model_version,
+        'settings': {
+            key: getattr(settings, key) for key in (
+                'INFERENCE_BACKEND', 'INFERENCE_BUCKET_WIDTH', 'INFERENCE_MAX_BATCH',
+                'INFERENCE_WINDOW_POINTS', 'INFERENCE_WORKERS', 'CLASSICAL_ENABLED',
+                'BATCHING_ENABLED', 'BATCH_MAX_SIZE', 'BATCH_MAX_WAIT_MS', 'CACHE_ENABLED',
+            )
+        },
+    }
+
+
+def run(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    # Корпус прогоняется несколько раз, поэтому без --cache кэш отключён,
+    # иначе все уровни конкурентности, кроме первого, измеряли бы только его
+    settings.CACHE_ENABLED = args.cache
+
+    requests = make_requests(args.requests, args.min_strokes, args.max_strokes,
+                             args.min_points, args.max_points, args.packed, args.seed)
+
+    need_servicer = 'recognize' in args.scenarios or ('grpc' in args.scenarios and not args.target)
+    servicer = HandwritingRecognizerServicer() if need_servicer else None
+    processor = servicer.trajectory_processor if servicer else None
+    if processor is None and 'smooth' in args.scenarios:
+        processor = get_trajectory_processor()
+
+    server = channel = None
+    rows = []
+    try:
+        for scenario in args.scenarios:
+            if scenario == 'smooth':
+                if args.packed:
+                    call = lambda coords: processor.smooth_arrays([coords])
+                else:
+                    call = processor.smooth_trajectory
+            elif scenario == 'recognize':
+                call = lambda request: servicer.Recognize(request, None)
+            else:
+                target = args.target
+                if target is None:
+                    server, target = start_local_server(servicer)
+                options, _ = server_options()
+                channel = grpc.insecure_channel(target, options=options)
+                stub = handwriting_pb2_grpc.HandwritingRecognizerStub(channel)
+                call = lambda request: stub.Recognize(request, timeout=args.timeout)
+
+            for concurrency in args.concurrency:
+                row = measure(scenario, call, requests, concurrency, args.warmup, args.packed)
+                rows.append(row)
+                print_row(row)
+    finally:
+        if channel is not None:
+            channel.close()
+        if server is not None:
+            server.stop(0)
+        if servicer is not None and servicer.batcher is not None:
+            servicer.batcher.stop()
+
+    model_version = processor.model_version if processor is not None else None
+    return {
+        'environment': environment(model_version),
+        'corpus': {
+            'requests': args.requests,
+            'strokes': [args.min_strokes, args.max_strokes],
+            'points': [args.min_points, args.max_points],
+            'packed': args.packed,
+            'seed': args.seed,
+        },
+        'results': rows,
+    }
+
+
+def print_header():
+    print(f"{'scenario':<12}{'conc':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'strokes/s':>12}{'errors':>8}")
+
+
+def print_row(row):
+    print(f"{row['scenario']:<12}{row['concurrency']:>6}{row.get('p50_ms', float('nan')):>10.2f}"
+          f"{row.get('p95_ms', float('nan')):>10.2f}{row.get('p99_ms', float('nan')):>10.2f}"
+          f"{row['strokes_per_sec']:>12.0f}{sum(row['errors'].values()):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--min-strokes', type=int, default=1)
+    parser.add_argument('--max-strokes', type=int, default=8)
+    parser.add_argument('--min-points', type=int, default=10)
+    parser.add_argument('--max-points', type=int, default=300)
+    parser.add_argument('--packed', action='store_true', help='точки в packed_points вместо points')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=10, help='вызовов прогрева перед замером')
+    parser.add_argument('--threads', type=int, default=0, help='потоки torch, 0 - по умолчанию')
+    parser.add_argument('--cache', action='store_true', help='включить кэш сглаженных штрихов')
+    parser.add_argument('--target', help='адрес внешнего сервера для сценария grpc')
+    parser.add_argument('--timeout', type=float, default=30.0, help='дедлайн gRPC-вызова, с')
+    parser.add_argument('--json', help='куда сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    print_header()
+    report = run(args)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Приблизительные накладные расходы на запись: ключ, кортеж и узел OrderedDict
+_ENTRY_OVERHEAD = 200
+
+
+def stroke_key(coords, model_version):
+    """Ключ кэша: хэш координат в каноническом виде (float64, little-endian) и версия модели"""
+    buffer = np.ascontiguousarray(coords, dtype='<f8')
+    digest = hashlib.blake2b(buffer.tobytes(), digest_size=16)
+    digest.update(model_version.encode())
+    return digest.digest()
+
+
+class StrokeCache:
+    """Ограниченный по памяти LRU-кэш сглаженных траекторий с TTL
+
+    Повторно присланные штрихи (переподключение, повтор, воспроизведение)
+    отдаются из кэша без инференса. Версия модели входит в ключ, поэтому после
+    горячей замены весов старые записи просто вытесняются.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, size = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        value = np.array(value, dtype=np.float64)
+        value.setflags(write=False)
+        size = value.nbytes + len(key) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def lookup(self, strokes, model_version):
+        """Ищет траектории в кэше; возвращает ключи, результаты (None для промахов) и индексы промахов"""
+        keys = [stroke_key(coords, model_version) for coords in strokes]
+        results = [self.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        return keys, results, missing
+
+    def store(self, keys, results, missing, computed):
+        """Дополняет результаты lookup посчитанными траекториями и кладёт их в кэш"""
+        for i, result in zip(missing, computed):
+            results[i] = result
+            self.put(keys[i], result)
+        return results
+
+    def smooth(self, strokes, model_version, smooth_fn):
+        """Отдаёт найденные в кэше траектории, остальные сглаживает одним вызовом smooth_fn"""
+        keys, results, missing = self.lookup(strokes, model_version)
+        if not missing:
+            return results
+        computed = smooth_fn([strokes[i] for i in missing])
+        return self.store(keys, results, missing, computed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+
+import torch
+
+# Версия формата файла чекпоинта. Увеличивается при несовместимых изменениях структуры.
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+class CheckpointError(Exception):
+    """Чекпоинт отсутствует, повреждён или имеет неподдерживаемый формат"""
+
+
+def save_checkpoint(model, path, model_version=None, metadata=None):
+    """Атомарно сохраняет веса модели в версионированный чекпоинт
+
+    Файл сначала пишется во временный файл рядом с целевым и затем
+    переименовывается, поэтому читатель никогда не увидит недописанный чекпоинт.
+    """
+    if model_version is None:
+        model_version = time.strftime("%Y%m%d%H%M%S")
+
+    state_dict = {k: v.detach().cpu() for k, v in model.state_dict().items()}
+    payload = {
+        "format_version": CHECKPOINT_FORMAT_VERSION,
+        "model_version": str(model_version),
+        "model_config": model.config(),
+        "state_dict": state_dict,
+        "created_at": time.time(),
+        "metadata": dict(metadata or {}),
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".pt")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            torch.save(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return payload["model_version"]
+
+
+def load_checkpoint(path, map_location="cpu"):
+    """Читает чекпоинт и проверяет его формат
+
+    Возвращает словарь с ключами format_version, model_version, model_config,
+    state_dict, created_at и metadata.
+    """
+    if not os.path.exists(path):
+        raise CheckpointError(f"Чекпоинт не найден: {path}")
+
+    try:
+        payload = torch.load(path, map_location=map_location, weights_only=True)
+    except Exception as ex:
+        raise CheckpointError(f"Не удалось прочитать чекпоинт {path}: {ex}") from ex
+
+    if not isinstance(payload, dict) or "state_dict" not in payload:
+        raise CheckpointError(f"Неизвестная структура чекпоинта: {path}")
+
+    format_version = payload.get("format_version")
+    if format_version != CHECKPOINT_FORMAT_VERSION:
+        raise CheckpointError(
+            f"Неподдерживаемая версия формата чекпоинта {format_version}, "
+            f"ожидается {CHECKPOINT_FORMAT_VERSION}"
+        )
+
+    return payload
@@ -0,0 +1,82 @@
+import numpy as np
+from scipy.signal import savgol_filter
+
+
+def savgol_smooth(coords, window=7, polyorder=2):
+    """Сглаживание Савицкого-Голея по обеим координатам, число точек не меняется"""
+    n = len(coords)
+    window = min(window, n if n % 2 else n - 1)
+    if window <= polyorder:
+        return coords
+    return savgol_filter(coords, window, polyorder, axis=0, mode='interp')
+
+
+def rdp_simplify(coords, epsilon):
+    """Упрощение Рамера-Дугласа-Пекера: убирает точки ближе epsilon к хорде
+
+    Расстояния до хорды на каждом шаге считаются векторно для всего отрезка.
+    """
+    n = len(coords)
+    if n < 3 or epsilon <= 0:
+        return coords
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a = coords[start]
+        chord = coords[end] - a
+        inner = coords[start + 1:end] - a
+        length = np.hypot(chord[0], chord[1])
+        if length < 1e-12:
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dist = np.abs(chord[0] * inner[:, 1] - chord[1] * inner[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > epsilon:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return coords[keep]
+
+
+def stroke_features(coords):
+    """Дешёвые признаки сложности штриха: прямолинейность и дрожание
+
+    straightness - отношение хорды к длине пути (1 для отрезка прямой),
+    jitter - средняя вторая разность, отнесённая к среднему шагу (0 для
+    равномерного движения без шума).
+    """
+    steps = np.diff(coords, axis=0)
+    step_len = np.hypot(steps[:, 0], steps[:, 1])
+    path = step_len.sum()
+    if path < 1e-12:
+        return 1.0, 0.0
+    chord = np.hypot(*(coords[-1] - coords[0]))
+    turns = np.diff(steps, axis=0)
+    jitter = np.hypot(turns[:, 0], turns[:, 1]).mean() / (step_len.mean() + 1e-12) if len(turns) else 0.0
+    return float(chord / path), float(jitter)
+
+
+def is_simple_stroke(coords, max_points, min_straightness, max_jitter):
+    """Решает, хватит ли штриху классического сглаживания вместо нейросети"""
+    if len(coords) <= max_points:
+        return True
+    straightness, jitter = stroke_features(coords)
+    return straightness >= min_straightness or jitter <= max_jitter
+
+
+def simplify_tolerance(coords, relative_epsilon):
+    """Абсолютный допуск RDP как доля диагонали ограничивающего прямоугольника"""
+    span = coords.max(axis=0) - coords.min(axis=0)
+    return relative_epsilon * float(np.hypot(span[0], span[1]))
+
+
+def classical_smooth(coords, window, polyorder, relative_epsilon):
+    """Классический путь: Савицкий-Голей, затем упрощение RDP"""
+    smoothed = savgol_smooth(coords, window, polyorder)
+    return rdp_simplify(smoothed, simplify_tolerance(coords, relative_epsilon))
@@ -0,0 +1,101 @@
+from pydantic_settings import BaseSettings
+from pydantic import Field
+
+
+class Settings(BaseSettings):
+    GRPC_PORT: int = Field(default=50051)
+    # Потоки gRPC в основном ждут планировщик инференса, поэтому их больше, чем ядер
+    GRPC_MAX_WORKERS: int = Field(default=16)
+    # sync - grpc.server с пулом потоков, aio - grpc.aio на asyncio
+    GRPC_SERVER_MODE: str = Field(default="sync")
+    # Предел размера сообщения в мегабайтах для больших пачек траекторий
+    GRPC_MAX_MESSAGE_MB: int = Field(default=32)
+    # Сжатие ответов: none, gzip или deflate
+    GRPC_COMPRESSION: str = Field(default="none")
+    # aio: предел одновременно обрабатываемых запросов, сверх него RESOURCE_EXHAUSTED
+    GRPC_MAX_INFLIGHT: int = Field(default=1024)
+    # aio: потоки для инференса, когда микробатчинг выключен
+    GRPC_AIO_EXECUTOR_WORKERS: int = Field(default=2)
+    # Минимальный интервал keepalive-пингов клиента без активных вызовов
+    GRPC_MIN_PING_INTERVAL_MS: int = Field(default=10000)
+
+    # Путь к чекпоинту TrajectorySmoother
+    MODEL_CHECKPOINT_PATH: str = Field(default="checkpoints/trajectory_smoother.pt")
+    # Обучать модель на синтетике, если чекпоинт не найден
+    MODEL_TRAIN_IF_MISSING: bool = Field(default=True)
+    # Сохранять обученную при старте модель в MODEL_CHECKPOINT_PATH
+    MODEL_SAVE_AFTER_TRAIN: bool = Field(default=True)
+
+    # Бэкенд инференса: eager, torchscript, onnx или int8 (см. backends.py)
+    INFERENCE_BACKEND: str = Field(default="eager")
+
+    # Ширина корзины длин траекторий при батчевом инференсе
+    INFERENCE_BUCKET_WIDTH: int = Field(default=32)
+    # Максимум траекторий в одном проходе модели
+    INFERENCE_MAX_BATCH: int = Field(default=64)
+    # Число intra-op потоков torch, 0 - значение torch по умолчанию
+    INFERENCE_THREADS: int = Field(default=0)
+    # Длина окна (с перекрытием) для траекторий длиннее окна, 0 - без нарезки
+    INFERENCE_WINDOW_POINTS: int = Field(default=4096)
+
+    # Классический путь для простых штрихов вместо нейросети
+    CLASSICAL_ENABLED: bool = Field(default=True)
+    # Штрихи не длиннее этого числа точек всегда идут классическим путём
+    CLASSICAL_MAX_POINTS: int = Field(default=12)
+    # Хорда / длина пути, начиная с которой штрих считается почти прямым
+    CLASSICAL_MIN_STRAIGHTNESS: float = Field(default=0.97)
+    # Средняя вторая разность / средний шаг, ниже которой штрих считается чистым
+    CLASSICAL_MAX_JITTER: float = Field(default=0.15)
+    CLASSICAL_SG_WINDOW: int = Field(default=7)
+    CLASSICAL_SG_POLYORDER: int = Field(default=2)
+    # Допуск упрощения RDP как доля диагонали штриха
+    SIMPLIFY_EPSILON: float = Field(default=0.002)
+    # Упрощать RDP также и выход нейросети
+    SIMPLIFY_MODEL_OUTPUT: bool = Field(default=False)
+
+    # Число процессов инференса, 0 - инференс в процессе gRPC-сервера
+    INFERENCE_WORKERS: int = Field(default=0)
+    # Потоки torch в каждом процессе инференса
+    INFERENCE_THREADS_PER_WORKER: int = Field(default=1)
+    # Закреплять процессы инференса за отдельными ядрами
+    INFERENCE_PIN_CORES: bool = Field(default=True)
+    # Ёмкость буфера разделяемой памяти процесса инференса в точках
+    INFERENCE_WORKER_BUFFER_POINTS: int = Field(default=65536)
+
+    # Микробатчинг траекторий из параллельных запросов в одном потоке инференса
+    BATCHING_ENABLED: bool = Field(default=True)
+    BATCH_MAX_SIZE: int = Field(default=64)
+    BATCH_MAX_WAIT_MS: float = Field(default=5.0)
+    BATCH_QUEUE_DEPTH: int = Field(default=256)
+    # Кэш сглаженных траекторий по хэшу точек и версии модели
+    CACHE_ENABLED: bool = Field(default=True)
+    CACHE_MAX_MB: float = Field(default=64.0)
+    CACHE_TTL_SECONDS: float = Field(default=600.0)
+
+    # SmoothStream: предел одновременно незавершённых штрихов в одном потоке
+    STREAM_MAX_STROKES: int = Field(default=64)
+
+    # Допуск запросов по ключу board_id или user_id: одновременные запросы и точки, 0 - без лимита
+    ADMISSION_KEY: str = Field(default="board_id")
+    ADMISSION_MAX_REQUESTS_PER_KEY: int = Field(default=32)
+    ADMISSION_MAX_POINTS_PER_KEY: int = Field(default=0)
+    # Отклонять запросы, оценка времени которых превышает остаток дедлайна
+    DEADLINE_SHEDDING: bool = Field(default=True)
+    # Запас к оценке времени инференса перед сравнением с дедлайном
+    DEADLINE_COST_MARGIN: float = Field(default=1.0)
+
+    # HTTP-порт /metrics и /healthz, 0 - не запускать
+    METRICS_PORT: int = Field(default=9464)
+    # Логи: уровень, формат json или text, предел одинаковых записей в секунду и запас
+    LOG_LEVEL: str = Field(default="INFO")
+    LOG_FORMAT: str = Field(default="json")
+    LOG_RATE_LIMIT: float = Field(default=10.0)
+    LOG_RATE_BURST: float = Field(default=50.0)
+    # Метаданные gRPC с идентификатором запроса для сквозной трассировки
+    TRACE_METADATA_KEY: str = Field(default="x-request-id")
+
+    # Период вывода статистики планировщика в секундах, 0 - не выводить
+    BATCH_STATS_LOG_INTERVAL: float = Field(default=60.0)
+
+
+settings = Settings()
@@ -0,0 +1,178 @@
+"""Экспорт TrajectorySmoother в TorchScript/ONNX/int8 и сравнение бэкендов инференса
+
+    python export.py export --checkpoint checkpoints/trajectory_smoother.pt --out-dir checkpoints/exported
+    python export.py compare --checkpoint checkpoints/trajectory_smoother.pt --tolerance 0.01
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+
+from backends import BACKENDS, to_int8, to_onnx, to_torchscript
+from checkpoint import load_checkpoint
+from config import settings
+from trajectory_smoother import TrajectoryProcessor, TrajectorySmoother
+
+
+def load_model(checkpoint_path):
+    payload = load_checkpoint(checkpoint_path)
+    model = TrajectorySmoother(**payload['model_config'])
+    model.load_state_dict(payload['state_dict'])
+    model.eval()
+    return model, payload['model_version']
+
+
+def export_artifacts(checkpoint_path, out_dir, formats):
+    """Сохраняет артефакты выбранных форматов и manifest.json с версией модели"""
+    model, version = load_model(checkpoint_path)
+    os.makedirs(out_dir, exist_ok=True)
+    artifacts = {}
+
+    if 'torchscript' in formats:
+        path = os.path.join(out_dir, 'trajectory_smoother.torchscript.pt')
+        torch.jit.save(to_torchscript(model), path)
+        artifacts['torchscript'] = path
+    if 'int8' in formats:
+        path = os.path.join(out_dir, 'trajectory_smoother.int8.pt')
+        torch.jit.save(to_int8(model), path)
+        artifacts['int8'] = path
+    if 'onnx' in formats:
+        path = os.path.join(out_dir, 'trajectory_smoother.onnx')
+        with open(path, 'wb') as f:
+            f.write(to_onnx(model))
+        artifacts['onnx'] = path
+
+    manifest = {'model_version': version, 'checkpoint': checkpoint_path, 'artifacts': artifacts}
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def make_corpus(num_strokes, min_points, max_points, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(min_points, max_points + 1, size=num_strokes)
+    return [np.cumsum(rng.normal(size=(n, 2)), axis=0) * 10.0 for n in lengths]
+
+
+@contextmanager
+def model_only():
+    """Временно отключает классический путь и упрощение выхода модели
+
+    Иначе короткие траектории обходят модель (нулевая ошибка у всех бэкендов),
+    а длины выходов разных бэкендов после упрощения могут не совпасть.
+    """
+    saved = settings.CLASSICAL_ENABLED, settings.SIMPLIFY_MODEL_OUTPUT
+    settings.CLASSICAL_ENABLED = False
+    settings.SIMPLIFY_MODEL_OUTPUT = False
+    try:
+        yield
+    finally:
+        settings.CLASSICAL_ENABLED, settings.SIMPLIFY_MODEL_OUTPUT = saved
+
+
+def compare_backends(checkpoint_path, backends, corpus, repeats=20, batch_size=32):
+    """Точность относительно eager и задержка smooth_arrays для каждого бэкенда
+
+    Ошибка считается в нормализованных координатах (доля от размаха траектории),
+    задержка - на батч из batch_size траекторий. Все траектории проходят
+    через модель: классический путь и упрощение выхода на время замера выключены.
+    """
+    with model_only():
+        return _compare_backends(checkpoint_path, backends, corpus, repeats, batch_size)
+
+
+def _compare_backends(checkpoint_path, backends, corpus, repeats, batch_size):
+    batches = [corpus[i:i + batch_size] for i in range(0, len(corpus), batch_size)]
+    spans = [np.maximum(coords.max(axis=0) - coords.min(axis=0), 1e-8) for coords in corpus]
+    reference = None
+    rows = []
+
+    for backend in backends:
+        processor = TrajectoryProcessor(checkpoint_path, train_if_missing=False, backend=backend)
+        outputs = [out for batch in batches for out in processor.smooth_arrays(batch)]
+        if reference is None:
+            reference = outputs
+
+        errors = np.concatenate([
+            (np.abs(out - ref) / span).ravel()
+            for out, ref, span in zip(outputs, reference, spans)
+        ])
+
+        timings = []
+        for _ in range(repeats):
+            for batch in batches:
+                started = time.perf_counter()
+                processor.smooth_arrays(batch)
+                timings.append((time.perf_counter() - started) * 1000.0)
+
+        rows.append({
+            'backend': backend,
+            'max_abs_error': float(errors.max()),
+            'mean_abs_error': float(errors.mean()),
+            'p50_ms': float(np.percentile(timings, 50)),
+            'p95_ms': float(np.percentile(timings, 95)),
+        })
+
+    base = rows[0]['p50_ms']
+    for row in rows:
+        row['speedup'] = base / row['p50_ms'] if row['p50_ms'] else 0.0
+    return rows
+
+
+def pick_backend(rows, tolerance):
+    """Самый быстрый бэкенд, ошибка которого не превышает tolerance"""
+    eligible = [row for row in rows if row['max_abs_error'] <= tolerance]
+    return min(eligible, key=lambda row: row['p50_ms'])['backend'] if eligible else 'eager'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='сохранить артефакты TorchScript/ONNX/int8')
+    export_parser.add_argument('--checkpoint', default=settings.MODEL_CHECKPOINT_PATH)
+    export_parser.add_argument('--out-dir', default='checkpoints/exported')
+    export_parser.add_argument('--formats', nargs='+', default=['torchscript', 'int8', 'onnx'],
+                               choices=[b for b in BACKENDS if b != 'eager'])
+
+    compare_parser = subparsers.add_parser('compare', help='сравнить точность и задержку бэкендов')
+    compare_parser.add_argument('--checkpoint', default=settings.MODEL_CHECKPOINT_PATH)
+    compare_parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    compare_parser.add_argument('--strokes', type=int, default=256)
+    compare_parser.add_argument('--min-points', type=int, default=10)
+    compare_parser.add_argument('--max-points', type=int, default=300)
+    compare_parser.add_argument('--batch-size', type=int, default=32)
+    compare_parser.add_argument('--repeats', type=int, default=20)
+    compare_parser.add_argument('--tolerance', type=float, default=0.01,
+                                help='допустимая ошибка в долях размаха траектории')
+    compare_parser.add_argument('--json', help='куда сохранить результаты в JSON')
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        manifest = export_artifacts(args.checkpoint, args.out_dir, args.formats)
+        print(json.dumps(manifest, indent=2, ensure_ascii=False))
+        return
+
+    backends = ['eager'] + [b for b in args.backends if b != 'eager']
+    corpus = make_corpus(args.strokes, args.min_points, args.max_points)
+    rows = compare_backends(args.checkpoint, backends, corpus, args.repeats, args.batch_size)
+    recommended = pick_backend(rows, args.tolerance)
+
+    print(f"{'backend':<12}{'max err':>12}{'mean err':>12}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>10}")
+    for row in rows:
+        print(f"{row['backend']:<12}{row['max_abs_error']:>12.2e}{row['mean_abs_error']:>12.2e}"
+              f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['speedup']:>10.2f}")
+    print(f"Рекомендуемый бэкенд при допуске {args.tolerance}: {recommended}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'tolerance': args.tolerance, 'recommended': recommended, 'results': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
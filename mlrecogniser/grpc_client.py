@@ -1,17 +1,375 @@
+"""Клиент сервиса сглаживания траекторий
+
+    with HandwritingClient("localhost:50051") as client:
+        smoothed = client.smooth_strokes([coords])  # coords - массивы (N, 2)
+
+Каналы создаются один раз и переиспользуются, keepalive держит соединения
+открытыми между вызовами, повторы при UNAVAILABLE выполняет сам gRPC по
+политике из service config. StrokeCoalescer и AsyncStrokeCoalescer собирают
+одиночные штрихи многих вызывающих в общие вызовы Recognize.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import grpc
+import numpy as np
+
 import handwriting_pb2
 import handwriting_pb2_grpc
 
-def recognise_image(image_bytes, host="localhost", port=50051):
-    channel = grpc.insecure_channel(f"{host}:{port}")
-    stub = handwriting_pb2_grpc.HandwritingRecognizerStub(channel)
-    request = handwriting_pb2.HandwritingRequest(image=image_bytes)
-    response = stub.Recognize(request)
-    return response.text
+SERVICE_NAME = 'handwriting.HandwritingRecognizer'
+# Формат packed_points: x0, y0, x1, y1, ... little-endian float32
+PACKED_DTYPE = np.dtype('<f4')
+
+
+def channel_options(keepalive_ms=30000, keepalive_timeout_ms=10000, max_message_mb=32,
+                    retries=3, initial_backoff=0.05, max_backoff=1.0):
+    """Опции канала: keepalive, размер сообщений и политика повторов"""
+    service_config = {
+        'methodConfig': [{
+            'name': [{'service': SERVICE_NAME}],
+            'retryPolicy': {
+                'maxAttempts': max(2, retries + 1),
+                'initialBackoff': f'{initial_backoff}s',
+                'maxBackoff': f'{max_backoff}s',
+                'backoffMultiplier': 2,
+                'retryableStatusCodes': ['UNAVAILABLE'],
+            },
+        }],
+    }
+    max_message = max_message_mb * 1024 * 1024
+    options = [
+        ('grpc.keepalive_time_ms', keepalive_ms),
+        ('grpc.keepalive_timeout_ms', keepalive_timeout_ms),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.max_pings_without_data', 0),
+        ('grpc.max_receive_message_length', max_message),
+        ('grpc.max_send_message_length', max_message),
+        ('grpc.enable_retries', 1 if retries else 0),
+        ('grpc.service_config', json.dumps(service_config)),
+    ]
+    return options
+
+
+class ChannelPool:
+    """Несколько долгоживущих каналов, выдаются по кругу
+
+    Одно HTTP/2-соединение ограничено числом одновременных потоков и одним
+    сетевым потоком событий, поэтому нагрузку распределяем по size каналам.
+    """
+
+    def __init__(self, target, size=4, options=None, aio=False):
+        options = list(options if options is not None else channel_options())
+        factory = grpc.aio.insecure_channel if aio else grpc.insecure_channel
+        # Уникальная опция у каждого канала, иначе gRPC отдаст всем одно соединение
+        self.channels = [
+            factory(target, options=options + [('grpc.channel_pool_index', i)])
+            for i in range(max(1, size))
+        ]
+        self._next = itertools.cycle(range(len(self.channels)))
+        self._lock = threading.Lock()
+
+    def channel(self):
+        with self._lock:
+            return self.channels[next(self._next)]
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+
+def array_to_packed(coords):
+    return np.ascontiguousarray(coords, dtype=PACKED_DTYPE).tobytes()
+
+
+def packed_to_array(data):
+    return np.frombuffer(data, dtype=PACKED_DTYPE).reshape(-1, 2).astype(np.float64)
+
+
+def build_request(strokes, color='#000000', thickness=1, user_id='', board_id=''):
+    """HandwritingRequest из траекторий (N, 2) в компактной форме packed_points"""
+    timestamp = int(time.time() * 1000)
+    return handwriting_pb2.HandwritingRequest(events=[
+        handwriting_pb2.DrawEvent(
+            type='draw',
+            user_id=user_id,
+            board_id=board_id,
+            payload=handwriting_pb2.DrawPayload(
+                packed_points=array_to_packed(coords), color=color, thickness=thickness),
+            timestamp=timestamp,
+        )
+        for coords in strokes
+    ])
+
+
+def response_strokes(response):
+    """Сглаженные траектории ответа в порядке событий запроса"""
+    strokes = []
+    for event in response.events:
+        payload = event.payload
+        if payload.packed_points:
+            strokes.append(packed_to_array(payload.packed_points))
+        else:
+            strokes.append(np.array([(p.x, p.y) for p in payload.points], dtype=np.float64).reshape(-1, 2))
+    return strokes
+
+
+class HandwritingClient:
+    """Синхронный клиент с пулом каналов, дедлайном по умолчанию и повторами"""
+
+    def __init__(self, target, pool_size=4, timeout=5.0, options=None, compression=None):
+        self.pool = ChannelPool(target, pool_size, options)
+        self.stubs = [handwriting_pb2_grpc.HandwritingRecognizerStub(ch) for ch in self.pool.channels]
+        self._next = itertools.cycle(range(len(self.stubs)))
+        self._lock = threading.Lock()
+        self.timeout = timeout
+        self.compression = compression
+
+    def stub(self):
+        with self._lock:
+            return self.stubs[next(self._next)]
+
+    def recognize(self, request, timeout=None, metadata=None):
+        return self.stub().Recognize(
+            request,
+            timeout=timeout if timeout is not None else self.timeout,
+            metadata=metadata,
+            compression=self.compression,
+        )
+
+    def smooth_strokes(self, strokes, timeout=None, metadata=None, **event_fields):
+        """Сглаживает траектории (N, 2) одним вызовом Recognize"""
+        if not strokes:
+            return []
+        response = self.recognize(build_request(strokes, **event_fields), timeout, metadata)
+        return response_strokes(response)
+
+    def smooth_stream(self, chunks, timeout=None, metadata=None):
+        return self.stub().SmoothStream(
+            iter(chunks),
+            timeout=timeout if timeout is not None else self.timeout,
+            metadata=metadata,
+        )
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncHandwritingClient:
+    """Клиент grpc.aio с тем же интерфейсом, что у HandwritingClient"""
+
+    def __init__(self, target, pool_size=4, timeout=5.0, options=None, compression=None):
+        self.pool = ChannelPool(target, pool_size, options, aio=True)
+        self.stubs = [handwriting_pb2_grpc.HandwritingRecognizerStub(ch) for ch in self.pool.channels]
+        self._next = itertools.cycle(range(len(self.stubs)))
+        self.timeout = timeout
+        self.compression = compression
+
+    def stub(self):
+        return self.stubs[next(self._next)]
+
+    async def recognize(self, request, timeout=None, metadata=None):
+        return await self.stub().Recognize(
+            request,
+            timeout=timeout if timeout is not None else self.timeout,
+            metadata=metadata,
+            compression=self.compression,
+        )
+
+    async def smooth_strokes(self, strokes, timeout=None, metadata=None, **event_fields):
+        if not strokes:
+            return []
+        response = await self.recognize(build_request(strokes, **event_fields), timeout, metadata)
+        return response_strokes(response)
+
+    def smooth_stream(self, chunks, timeout=None, metadata=None):
+        return self.stub().SmoothStream(
+            chunks,
+            timeout=timeout if timeout is not None else self.timeout,
+            metadata=metadata,
+        )
+
+    async def close(self):
+        for channel in self.pool.channels:
+            await channel.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class CoalescerFullError(Exception):
+    """Слишком много штрихов ждёт отправки, вызов нужно отклонить"""
+
+
+class StrokeCoalescer:
+    """Собирает одиночные штрихи из многих потоков в общие вызовы Recognize
+
+    Вызов закрывается, когда набралось max_batch_size штрихов или прошло
+    max_wait_ms с первого штриха. Готовые вызовы уходят в пул из max_in_flight
+    потоков (по умолчанию - по одному на канал клиента), поэтому несколько
+    вызовов выполняются одновременно. Ошибка вызова достаётся всем его штрихам.
+    """
+
+    def __init__(self, client, max_batch_size=64, max_wait_ms=2.0, queue_depth=1024, timeout=None,
+                 max_in_flight=None):
+        self.client = client
+        self.timeout = timeout
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.queue_depth = queue_depth
+        if max_in_flight is None:
+            max_in_flight = len(getattr(client, 'stubs', ())) or 1
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix='coalescer')
+        self._lock = threading.Lock()
+        self._pending = []
+        self._outstanding = 0
+        self._timer = None
+        self._closed = False
+
+    def submit(self, coords):
+        """Future с одной сглаженной траекторией"""
+        future = Future()
+        batch = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("StrokeCoalescer закрыт")
+            if self._outstanding >= self.queue_depth:
+                raise CoalescerFullError(f"Очередь отправки заполнена ({self.queue_depth})")
+            self._outstanding += 1
+            self._pending.append((coords, future))
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._executor.submit(self._send, batch)
+        return future
+
+    def smooth(self, coords, timeout=None):
+        return self.submit(coords).result(timeout)
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch):
+        try:
+            # Штрихи, отменённые пока ждали отправки, в вызов не попадают
+            active = [(coords, future) for coords, future in batch if future.set_running_or_notify_cancel()]
+            if not active:
+                return
+            try:
+                results = self.client.smooth_strokes([coords for coords, _ in active], timeout=self.timeout)
+            except Exception as ex:
+                for _, future in active:
+                    future.set_exception(ex)
+                return
+            for (_, future), result in zip(active, results):
+                future.set_result(result)
+        finally:
+            with self._lock:
+                self._outstanding -= len(batch)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            batch = self._take()
+        if batch:
+            self._executor.submit(self._send, batch)
+        self._executor.shutdown(wait=True)
+
+
+class AsyncStrokeCoalescer:
+    """Объединение одиночных штрихов в общие вызовы Recognize для asyncio"""
+
+    def __init__(self, client, max_batch_size=64, max_wait_ms=2.0, timeout=None):
+        self.client = client
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.timeout = timeout
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def smooth(self, coords):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((coords, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        try:
+            results = await self.client.smooth_strokes([coords for coords, _ in batch], timeout=self.timeout)
+        except Exception as ex:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка сервиса: сглаживает случайные штрихи')
+    parser.add_argument('--target', default='localhost:50051')
+    parser.add_argument('--strokes', type=int, default=4)
+    parser.add_argument('--points', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng()
+    strokes = [np.cumsum(rng.normal(size=(args.points, 2)), axis=0) * 10.0 for _ in range(args.strokes)]
+    with HandwritingClient(args.target, pool_size=1, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        smoothed = client.smooth_strokes(strokes)
+        elapsed = (time.perf_counter() - started) * 1000.0
+    print(f"Сглажено штрихов: {len(smoothed)}, точек: {[len(s) for s in smoothed]}, {elapsed:.1f} мс")
+
 
 if __name__ == "__main__":
-    # Пример: читаем картинку из файла
-    with open("test_image.png", "rb") as f:
-        img_bytes = f.read()
-    text = recognise_image(img_bytes)
-    print("Распознанный текст:", text) 
\ No newline at end of file
+    main()
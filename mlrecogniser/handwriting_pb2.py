@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11handwriting.proto\x12\x0bhandwriting\"<\n\x12HandwritingRequest\x12&\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x16.handwriting.DrawEvent\"z\n\tDrawEvent\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12\x10\n\x08\x62oard_id\x18\x03 \x01(\t\x12)\n\x07payload\x18\x04 \x01(\x0b\x32\x18.handwriting.DrawPayload\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\"S\n\x0b\x44rawPayload\x12\"\n\x06points\x18\x01 \x03(\x0b\x32\x12.handwriting.Point\x12\r\n\x05\x63olor\x18\x02 \x01(\t\x12\x11\n\tthickness\x18\x03 \x01(\x05\"\x1d\n\x05Point\x12\t\n\x01x\x18\x01 \x01(\x01\x12\t\n\x01y\x18\x02 \x01(\x01\"=\n\x13HandwritingResponse\x12&\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x16.handwriting.DrawEvent2i\n\x15HandwritingRecognizer\x12P\n\tRecognize\x12\x1f.handwriting.HandwritingRequest\x1a .handwriting.HandwritingResponse\"\x00\x42\x1dZ\x1b./handwriting;handwritingpbb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11handwriting.proto\x12\x0bhandwriting\"<\n\x12HandwritingRequest\x12&\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x16.handwriting.DrawEvent\"z\n\tDrawEvent\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12\x10\n\x08\x62oard_id\x18\x03 \x01(\t\x12)\n\x07payload\x18\x04 \x01(\x0b\x32\x18.handwriting.DrawPayload\x12\x11\n\ttimestamp\x18\x05 \x01(\x03\"j\n\x0b\x44rawPayload\x12\"\n\x06points\x18\x01 \x03(\x0b\x32\x12.handwriting.Point\x12\r\n\x05\x63olor\x18\x02 \x01(\t\x12\x11\n\tthickness\x18\x03 \x01(\x05\x12\x15\n\rpacked_points\x18\x04 \x01(\x0c\"\x1d\n\x05Point\x12\t\n\x01x\x18\x01 \x01(\x01\x12\t\n\x01y\x18\x02 \x01(\x01\"=\n\x13HandwritingResponse\x12&\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x16.handwriting.DrawEvent\"h\n\x0bStrokeChunk\x12\x11\n\tstroke_id\x18\x01 \x01(\t\x12\"\n\x06points\x18\x02 \x03(\x0b\x32\x12.handwriting.Point\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x08\x12\x15\n\rpacked_points\x18\x04 \x01(\x0c\"z\n\rSmoothedChunk\x12\x11\n\tstroke_id\x18\x01 \x01(\t\x12\x0e\n\x06offset\x18\x02 \x01(\r\x12\"\n\x06points\x18\x03 \x03(\x0b\x32\x12.handwriting.Point\x12\x0b\n\x03\x65nd\x18\x04 \x01(\x08\x12\x15\n\rpacked_points\x18\x05 \x01(\x0c\x32\xb5\x01\n\x15HandwritingRecognizer\x12P\n\tRecognize\x12\x1f.handwriting.HandwritingRequest\x1a .handwriting.HandwritingResponse\"\x00\x12J\n\x0cSmoothStream\x12\x18.handwriting.StrokeChunk\x1a\x1a.handwriting.SmoothedChunk\"\x00(\x01\x30\x01\x42\x1dZ\x1b./handwriting;handwritingpbb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,11 +37,15 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_DRAWEVENT']._serialized_start=96
   _globals['_DRAWEVENT']._serialized_end=218
   _globals['_DRAWPAYLOAD']._serialized_start=220
-  _globals['_DRAWPAYLOAD']._serialized_end=303
-  _globals['_POINT']._serialized_start=305
-  _globals['_POINT']._serialized_end=334
-  _globals['_HANDWRITINGRESPONSE']._serialized_start=336
-  _globals['_HANDWRITINGRESPONSE']._serialized_end=397
-  _globals['_HANDWRITINGRECOGNIZER']._serialized_start=399
-  _globals['_HANDWRITINGRECOGNIZER']._serialized_end=504
+  _globals['_DRAWPAYLOAD']._serialized_end=326
+  _globals['_POINT']._serialized_start=328
+  _globals['_POINT']._serialized_end=357
+  _globals['_HANDWRITINGRESPONSE']._serialized_start=359
+  _globals['_HANDWRITINGRESPONSE']._serialized_end=420
+  _globals['_STROKECHUNK']._serialized_start=422
+  _globals['_STROKECHUNK']._serialized_end=526
+  _globals['_SMOOTHEDCHUNK']._serialized_start=528
+  _globals['_SMOOTHEDCHUNK']._serialized_end=650
+  _globals['_HANDWRITINGRECOGNIZER']._serialized_start=653
+  _globals['_HANDWRITINGRECOGNIZER']._serialized_end=834
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,11 @@ class HandwritingRecognizerStub(object):
                 request_serializer=handwriting__pb2.HandwritingRequest.SerializeToString,
                 response_deserializer=handwriting__pb2.HandwritingResponse.FromString,
                 _registered_method=True)
+        self.SmoothStream = channel.stream_stream(
+                '/handwriting.HandwritingRecognizer/SmoothStream',
+                request_serializer=handwriting__pb2.StrokeChunk.SerializeToString,
+                response_deserializer=handwriting__pb2.SmoothedChunk.FromString,
+                _registered_method=True)
 
 
 class HandwritingRecognizerServicer(object):
@@ -50,6 +55,13 @@ class HandwritingRecognizerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SmoothStream(self, request_iterator, context):
+        """Сглаживание штрихов по мере рисования: точки приходят фрагментами
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_HandwritingRecognizerServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +70,11 @@ def add_HandwritingRecognizerServicer_to_server(servicer, server):
                     request_deserializer=handwriting__pb2.HandwritingRequest.FromString,
                     response_serializer=handwriting__pb2.HandwritingResponse.SerializeToString,
             ),
+            'SmoothStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.SmoothStream,
+                    request_deserializer=handwriting__pb2.StrokeChunk.FromString,
+                    response_serializer=handwriting__pb2.SmoothedChunk.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'handwriting.HandwritingRecognizer', rpc_method_handlers)
@@ -95,3 +112,30 @@ class HandwritingRecognizer(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SmoothStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/handwriting.HandwritingRecognizer/SmoothStream',
+            handwriting__pb2.StrokeChunk.SerializeToString,
+            handwriting__pb2.SmoothedChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
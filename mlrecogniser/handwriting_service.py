@@ -1,57 +1,476 @@
+import asyncio
 import grpc
+import logging
 from concurrent import futures
+import signal
 import time
+import uuid
+import torch
 import handwriting_pb2
 import handwriting_pb2_grpc
-from trajectory_smoother import get_trajectory_processor
+from admission import (AdmissionController, AdmissionError, CostModel, DeadlineError, RequestCancelledError,
+                       admission_key)
+from batching import BatcherStoppedError, MicroBatcher, QueueFullError
+from cache import StrokeCache
+from checkpoint import CheckpointError
+from config import settings
+from logs import configure_logging
+from metrics import (BATCH_SIZE, ERRORS, INFERENCE_TIME, REGISTRY, REQUEST_LATENCY, STROKE_POINTS,
+                     start_metrics_server)
+from streaming import StreamSession, TooManyStrokesError
+from trajectory_smoother import array_to_packed, array_to_points, get_trajectory_processor, stroke_to_array
+from worker_pool import InferenceWorkerPool
+
+logger = logging.getLogger(__name__)
+
+NO_DEADLINE_SECONDS = 365 * 24 * 3600
+
+# Ошибки сглаживания, которые превращаются в статус ответа
+ERROR_STATUS = {
+    QueueFullError: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    BatcherStoppedError: grpc.StatusCode.UNAVAILABLE,
+    AdmissionError: grpc.StatusCode.RESOURCE_EXHAUSTED,
+    DeadlineError: grpc.StatusCode.DEADLINE_EXCEEDED,
+    RequestCancelledError: grpc.StatusCode.CANCELLED,
+}
+
 
 class HandwritingRecognizerServicer(handwriting_pb2_grpc.HandwritingRecognizerServicer):
     def __init__(self):
         # Инициализируем процессор траекторий при создании сервиса
         self.trajectory_processor = get_trajectory_processor()
-    
-    def Recognize(self, request, context):
-        print(f"Получено событий draw: {len(request.events)}")
-        new_events = []
-        
-        for i, event in enumerate(request.events):
-            print(f"Обрабатываю событие {i+1}/{len(request.events)}, точек: {len(event.payload.points)}")
-            
-            # Применяем нейронную сеть для сглаживания
-            smoothed_points = self.trajectory_processor.smooth_trajectory(event.payload.points)
-            
-            print(f"Событие {i+1}: {len(event.payload.points)} -> {len(smoothed_points)} точек")
-            
-            new_payload = handwriting_pb2.DrawPayload(
-                points=smoothed_points,
-                color=event.payload.color,
-                thickness=event.payload.thickness
+
+        # Инференс Recognize: в этом процессе или в пуле процессов с общей памятью
+        self.backend = self.trajectory_processor
+        if settings.INFERENCE_WORKERS > 0:
+            self.backend = InferenceWorkerPool(
+                settings.INFERENCE_WORKERS,
+                self.trajectory_processor.checkpoint_path,
+                threads_per_worker=settings.INFERENCE_THREADS_PER_WORKER,
+                pin_cores=settings.INFERENCE_PIN_CORES,
+                buffer_points=settings.INFERENCE_WORKER_BUFFER_POINTS,
             )
-            new_event = handwriting_pb2.DrawEvent(
-                type=event.type,
-                user_id=event.user_id,
-                board_id=event.board_id,
-                payload=new_payload,
-                timestamp=event.timestamp
+
+        self.cache = None
+        if settings.CACHE_ENABLED:
+            self.cache = StrokeCache(
+                max_bytes=int(settings.CACHE_MAX_MB * 1024 * 1024),
+                ttl=settings.CACHE_TTL_SECONDS,
             )
-            new_events.append(new_event)
-        
-        print(f"Обработано событий: {len(new_events)}")
-        return handwriting_pb2.HandwritingResponse(events=new_events)
+
+        self.batcher = None
+        if settings.BATCHING_ENABLED:
+            self.batcher = MicroBatcher(
+                self.run_inference,
+                max_batch_size=settings.BATCH_MAX_SIZE,
+                max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+                queue_depth=settings.BATCH_QUEUE_DEPTH,
+                stats_log_interval=settings.BATCH_STATS_LOG_INTERVAL,
+            ).start()
+
+        self.cost_model = CostModel()
+        self.admission = AdmissionController(
+            max_requests=settings.ADMISSION_MAX_REQUESTS_PER_KEY,
+            max_points=settings.ADMISSION_MAX_POINTS_PER_KEY,
+        )
+
+        self.register_metrics()
+
+    def register_metrics(self):
+        """Показатели кэша и планировщика, которые считываются при каждом scrape"""
+        if self.cache is not None:
+            REGISTRY.gauge_fn('recogniser_cache_hit_ratio', 'Доля попаданий в кэш штрихов',
+                              lambda: self.cache.stats()['hit_ratio'])
+            REGISTRY.gauge_fn('recogniser_cache_bytes', 'Занятая кэшем память',
+                              lambda: self.cache.stats()['bytes'])
+            REGISTRY.counter_fn('recogniser_cache_hits_total', 'Попадания в кэш штрихов',
+                                lambda: self.cache.stats()['hits'])
+            REGISTRY.counter_fn('recogniser_cache_misses_total', 'Промахи кэша штрихов',
+                                lambda: self.cache.stats()['misses'])
+            REGISTRY.counter_fn('recogniser_cache_evictions_total', 'Записи, вытесненные по лимиту памяти',
+                                lambda: self.cache.stats()['evictions'])
+            REGISTRY.counter_fn('recogniser_cache_expirations_total', 'Записи, удалённые по TTL',
+                                lambda: self.cache.stats()['expirations'])
+        if self.batcher is not None:
+            REGISTRY.gauge_fn('recogniser_queue_size', 'Запросов в очереди планировщика',
+                              lambda: self.batcher.stats()['queue_size'])
+
+    def health(self):
+        """Состояние для /healthz"""
+        return {
+            'status': 'ok',
+            'model_version': self.backend.model_version,
+            'backend': settings.INFERENCE_BACKEND,
+        }
+
+    def reload_model(self, path=None):
+        """Горячая замена весов модели без перезапуска сервера"""
+        try:
+            version = self.trajectory_processor.load_model(path)
+            if self.backend is not self.trajectory_processor:
+                version = self.backend.load_model(path)
+        except (CheckpointError, RuntimeError, TypeError) as ex:
+            logger.error("Не удалось перезагрузить модель, продолжаю на версии %s: %s",
+                         self.trajectory_processor.model_version, ex)
+            return None
+        logger.info("Модель перезагружена", extra={'model_version': version})
+        return version
+
+    def run_inference(self, strokes):
+        """Один вызов бэкенда инференса с замером времени и размера батча"""
+        started = time.perf_counter()
+        results = self.backend.smooth_arrays(strokes)
+        elapsed = time.perf_counter() - started
+        INFERENCE_TIME.observe(elapsed)
+        BATCH_SIZE.observe(len(strokes))
+        self.cost_model.observe(sum(len(coords) for coords in strokes), elapsed)
+        return results
+
+    def check_deadline(self, context, strokes):
+        """Прерывает работу, если клиент ушёл или оценка времени больше остатка дедлайна
+
+        Возвращает остаток дедлайна в секундах или None, если дедлайна нет.
+        """
+        if context is None:
+            return None
+        if not context_active(context):
+            raise RequestCancelledError("Клиент отменил запрос")
+        remaining = context.time_remaining()
+        # Без дедлайна grpc.server возвращает огромное значение, а grpc.aio - None
+        if remaining is None or remaining > NO_DEADLINE_SECONDS:
+            return None
+        if remaining <= 0:
+            raise DeadlineError("Дедлайн запроса истёк")
+        if settings.DEADLINE_SHEDDING:
+            points = sum(len(coords) for coords in strokes)
+            estimate = self.cost_model.estimate(points) * settings.DEADLINE_COST_MARGIN
+            if estimate > remaining:
+                raise DeadlineError(
+                    f"Оценка времени {estimate * 1000:.1f} мс на {points} точек "
+                    f"превышает остаток дедлайна {remaining * 1000:.1f} мс")
+        return remaining
+
+    def chunks(self, strokes):
+        """Порции траекторий для инференса без планировщика; между ними проверяется клиент"""
+        step = max(1, settings.INFERENCE_MAX_BATCH)
+        return [strokes[start:start + step] for start in range(0, len(strokes), step)]
+
+    def infer(self, strokes, context=None):
+        """Сглаживает траектории (N, 2) через планировщик или напрямую через бэкенд инференса"""
+        remaining = self.check_deadline(context, strokes)
+        if self.batcher is not None:
+            future = self.batcher.submit(strokes)
+            if context is not None:
+                # Отключение клиента снимает запрос с очереди, пока его батч не собран
+                context.add_callback(future.cancel)
+            try:
+                return future.result(timeout=remaining)
+            except futures.TimeoutError:
+                future.cancel()
+                raise DeadlineError("Дедлайн истёк в очереди инференса")
+            except futures.CancelledError:
+                raise RequestCancelledError("Клиент отменил запрос")
+
+        results = []
+        for i, chunk in enumerate(self.chunks(strokes)):
+            if i:
+                self.check_deadline(context, chunk)
+            results.extend(self.run_inference(chunk))
+        return results
+
+    def smooth(self, strokes, context=None):
+        """Сглаживает траектории, отдавая повторно присланные штрихи из кэша"""
+        if self.cache is None:
+            return self.infer(strokes, context)
+        return self.cache.smooth(strokes, self.backend.model_version,
+                                 lambda missing: self.infer(missing, context))
+
+    def Recognize(self, request, context):
+        started = time.perf_counter()
+        rid = request_id(context)
+        status = grpc.StatusCode.OK
+        try:
+            try:
+                strokes = request_strokes(request)
+            except ValueError as ex:
+                status = grpc.StatusCode.INVALID_ARGUMENT
+                context.abort(status, str(ex))
+
+            # Все траектории запроса сглаживаются одним батчевым вызовом
+            points = sum(len(coords) for coords in strokes)
+            try:
+                with self.admission.admit(admission_key(request, settings.ADMISSION_KEY), points):
+                    smoothed = self.smooth(strokes, context)
+            except tuple(ERROR_STATUS) as ex:
+                status = ERROR_STATUS[type(ex)]
+                context.abort(status, str(ex))
+
+            return build_response(request, smoothed)
+        except Exception:
+            if status == grpc.StatusCode.OK:
+                status = grpc.StatusCode.UNKNOWN
+                logger.exception("Ошибка Recognize", extra={'request_id': rid})
+            raise
+        finally:
+            finish_request('Recognize', status, started, rid, request)
+
+    def SmoothStream(self, request_iterator, context):
+        session = StreamSession(self.trajectory_processor, settings.STREAM_MAX_STROKES)
+        for chunk in request_iterator:
+            try:
+                smoothed_chunk = session.handle(chunk)
+            except TooManyStrokesError as ex:
+                ERRORS.inc('SmoothStream', 'RESOURCE_EXHAUSTED')
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(ex))
+            except ValueError as ex:
+                ERRORS.inc('SmoothStream', 'INVALID_ARGUMENT')
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(ex))
+            if smoothed_chunk is not None:
+                yield smoothed_chunk
+
+
+class AsyncHandwritingRecognizerServicer(handwriting_pb2_grpc.HandwritingRecognizerServicer):
+    """Сервис для grpc.aio: инференс выполняется вне event loop"""
+
+    def __init__(self, servicer=None, max_inflight=None, executor=None):
+        # Модель, планировщик и горячая замена весов общие с синхронным сервисом
+        self.servicer = servicer or HandwritingRecognizerServicer()
+        self.max_inflight = max_inflight or settings.GRPC_MAX_INFLIGHT
+        self.executor = executor or futures.ThreadPoolExecutor(
+            max_workers=settings.GRPC_AIO_EXECUTOR_WORKERS, thread_name_prefix="inference")
+        self.inflight = 0
+        REGISTRY.gauge_fn('recogniser_inflight', 'Запросов в обработке (asyncio)', lambda: self.inflight)
+
+    async def infer(self, strokes, context=None):
+        remaining = self.servicer.check_deadline(context, strokes)
+        batcher = self.servicer.batcher
+        if batcher is not None:
+            # Отмена задачи (клиент ушёл или истёк дедлайн) отменяет и Future в очереди планировщика
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(batcher.submit(strokes)), remaining)
+            except asyncio.TimeoutError:
+                raise DeadlineError("Дедлайн истёк в очереди инференса")
+
+        loop = asyncio.get_running_loop()
+        results = []
+        for i, chunk in enumerate(self.servicer.chunks(strokes)):
+            if i:
+                self.servicer.check_deadline(context, chunk)
+            results.extend(await loop.run_in_executor(self.executor, self.servicer.run_inference, chunk))
+        return results
+
+    async def smooth(self, strokes, context=None):
+        cache = self.servicer.cache
+        if cache is None:
+            return await self.infer(strokes, context)
+        keys, results, missing = cache.lookup(strokes, self.servicer.backend.model_version)
+        if not missing:
+            return results
+        computed = await self.infer([strokes[i] for i in missing], context)
+        return cache.store(keys, results, missing, computed)
+
+    async def Recognize(self, request, context):
+        started = time.perf_counter()
+        rid = request_id(context)
+        status = grpc.StatusCode.OK
+        try:
+            # Допуск запросов: при переполнении отказываем сразу, а не копим очередь
+            if self.inflight >= self.max_inflight:
+                status = grpc.StatusCode.RESOURCE_EXHAUSTED
+                await context.abort(status, f"Слишком много запросов в обработке ({self.max_inflight})")
+
+            try:
+                strokes = request_strokes(request)
+            except ValueError as ex:
+                status = grpc.StatusCode.INVALID_ARGUMENT
+                await context.abort(status, str(ex))
+
+            points = sum(len(coords) for coords in strokes)
+            self.inflight += 1
+            try:
+                with self.servicer.admission.admit(admission_key(request, settings.ADMISSION_KEY), points):
+                    smoothed = await self.smooth(strokes, context)
+            except tuple(ERROR_STATUS) as ex:
+                status = ERROR_STATUS[type(ex)]
+                await context.abort(status, str(ex))
+            finally:
+                self.inflight -= 1
+
+            return build_response(request, smoothed)
+        except asyncio.CancelledError:
+            status = grpc.StatusCode.CANCELLED
+            raise
+        except Exception:
+            if status == grpc.StatusCode.OK:
+                status = grpc.StatusCode.UNKNOWN
+                logger.exception("Ошибка Recognize", extra={'request_id': rid})
+            raise
+        finally:
+            finish_request('Recognize', status, started, rid, request)
+
+    async def SmoothStream(self, request_iterator, context):
+        session = StreamSession(self.servicer.trajectory_processor, settings.STREAM_MAX_STROKES)
+        loop = asyncio.get_running_loop()
+        async for chunk in request_iterator:
+            try:
+                smoothed_chunk = await loop.run_in_executor(self.executor, session.handle, chunk)
+            except TooManyStrokesError as ex:
+                ERRORS.inc('SmoothStream', 'RESOURCE_EXHAUSTED')
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(ex))
+            except ValueError as ex:
+                ERRORS.inc('SmoothStream', 'INVALID_ARGUMENT')
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(ex))
+            if smoothed_chunk is not None:
+                yield smoothed_chunk
+
+
+def request_strokes(request):
+    """Траектории всех событий запроса в виде массивов (N, 2)"""
+    strokes = [stroke_to_array(event.payload) for event in request.events]
+    for coords in strokes:
+        STROKE_POINTS.observe(len(coords))
+    return strokes
+
+
+def context_active(context):
+    """Клиент ещё ждёт ответа: is_active у grpc.server, cancelled у grpc.aio"""
+    if hasattr(context, 'is_active'):
+        return context.is_active()
+    return not context.cancelled()
+
+
+def request_id(context):
+    """Идентификатор запроса из метаданных TRACE_METADATA_KEY или новый"""
+    if context is not None:
+        for key, value in context.invocation_metadata() or ():
+            if key == settings.TRACE_METADATA_KEY:
+                return value
+    return uuid.uuid4().hex
+
+
+def finish_request(method, status, started, rid, request):
+    """Метрики и структурированная запись о завершённом запросе"""
+    elapsed = time.perf_counter() - started
+    REQUEST_LATENCY.observe(elapsed, method, status.name)
+    if status != grpc.StatusCode.OK:
+        ERRORS.inc(method, status.name)
+    logger.info("Запрос обработан", extra={
+        'method': method,
+        'request_id': rid,
+        'code': status.name,
+        'events': len(request.events),
+        'duration_ms': round(elapsed * 1000.0, 3),
+    })
+
+
+def build_response(request, smoothed):
+    """Собирает ответ из исходных событий и сглаженных траекторий"""
+    new_events = []
+    for event, coords in zip(request.events, smoothed):
+        new_payload = handwriting_pb2.DrawPayload(
+            color=event.payload.color,
+            thickness=event.payload.thickness
+        )
+        # Отвечаем в той же форме, в которой пришли точки
+        if event.payload.packed_points:
+            new_payload.packed_points = array_to_packed(coords)
+        else:
+            new_payload.points.extend(array_to_points(coords))
+        new_event = handwriting_pb2.DrawEvent(
+            type=event.type,
+            user_id=event.user_id,
+            board_id=event.board_id,
+            payload=new_payload,
+            timestamp=event.timestamp
+        )
+        new_events.append(new_event)
+
+    return handwriting_pb2.HandwritingResponse(events=new_events)
+
+
+def server_options():
+    """Общие опции gRPC-сервера: размер сообщений, keepalive клиентов и сжатие"""
+    max_message = settings.GRPC_MAX_MESSAGE_MB * 1024 * 1024
+    options = [
+        ('grpc.max_receive_message_length', max_message),
+        ('grpc.max_send_message_length', max_message),
+        # Долгоживущие каналы клиентов пингуют сервер и между вызовами
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.min_recv_ping_interval_without_data_ms', settings.GRPC_MIN_PING_INTERVAL_MS),
+        ('grpc.http2.max_ping_strikes', 0),
+    ]
+    compression = {
+        'none': grpc.Compression.NoCompression,
+        'gzip': grpc.Compression.Gzip,
+        'deflate': grpc.Compression.Deflate,
+    }[settings.GRPC_COMPRESSION.lower()]
+    return options, compression
+
+
+def start_metrics(servicer):
+    if settings.METRICS_PORT:
+        start_metrics_server(settings.METRICS_PORT, servicer.health)
+        logger.info("Метрики доступны", extra={'port': settings.METRICS_PORT, 'path': '/metrics'})
+
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
-    handwriting_pb2_grpc.add_HandwritingRecognizerServicer_to_server(
-        HandwritingRecognizerServicer(), server)
-    server.add_insecure_port('[::]:50051')
+    configure_logging()
+    if settings.INFERENCE_THREADS > 0:
+        torch.set_num_threads(settings.INFERENCE_THREADS)
+
+    options, compression = server_options()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=settings.GRPC_MAX_WORKERS),
+        options=options,
+        compression=compression,
+    )
+    servicer = HandwritingRecognizerServicer()
+    handwriting_pb2_grpc.add_HandwritingRecognizerServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{settings.GRPC_PORT}')
+    start_metrics(servicer)
+
+    # SIGHUP перечитывает MODEL_CHECKPOINT_PATH и подменяет веса на лету
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: servicer.reload_model())
+
     server.start()
-    print("gRPC сервер для рукописного текста запущен на порту 50051")
-    print("Используется нейронная сеть Conv1D для сглаживания траекторий")
+    logger.info("gRPC сервер для рукописного текста запущен", extra={'port': settings.GRPC_PORT})
     try:
         while True:
             time.sleep(86400)
     except KeyboardInterrupt:
         server.stop(0)
 
+
+async def serve_aio():
+    configure_logging()
+    if settings.INFERENCE_THREADS > 0:
+        torch.set_num_threads(settings.INFERENCE_THREADS)
+
+    options, compression = server_options()
+    server = grpc.aio.server(options=options, compression=compression)
+    servicer = AsyncHandwritingRecognizerServicer()
+    handwriting_pb2_grpc.add_HandwritingRecognizerServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{settings.GRPC_PORT}')
+    start_metrics(servicer.servicer)
+
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, 'SIGHUP'):
+        # Загрузка весов блокирует, поэтому она идёт в пуле потоков, а не в цикле событий
+        loop.add_signal_handler(
+            signal.SIGHUP, lambda: loop.run_in_executor(None, servicer.servicer.reload_model)
+        )
+
+    await server.start()
+    logger.info("gRPC сервер (asyncio) для рукописного текста запущен", extra={'port': settings.GRPC_PORT})
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(5)
+
+
 if __name__ == '__main__':
-    serve() 
\ No newline at end of file
+    if settings.GRPC_SERVER_MODE == 'aio':
+        asyncio.run(serve_aio())
+    else:
+        serve() 
\ No newline at end of file
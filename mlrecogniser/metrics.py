@@ -0,0 +1,197 @@
+"""Метрики сервиса в текстовом формате Prometheus без внешних зависимостей
+
+/metrics отдаёт гистограммы и счётчики, /healthz - состояние модели.
+"""
+import bisect
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POINTS_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, как histogram в Prometheus"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return series[2] if series else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count)
+                        for labels, (counts, total, count) in sorted(self._series.items())]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                label_str = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{label_str} {cumulative}')
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_str} {_format_value(total)}')
+            lines.append(f'{self.name}_count{label_str} {count}')
+        return lines
+
+
+class GaugeFunction:
+    """Значение, которое считывается в момент запроса /metrics"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, fn):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        lines.append(f'{self.name} {_format_value(value)}')
+        return lines
+
+
+class CounterFunction(GaugeFunction):
+    """Монотонный счётчик, который ведёт сам объект и отдаёт при scrape"""
+
+    metric_type = 'counter'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        # Повторная регистрация по имени заменяет метрику (новый экземпляр сервиса)
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_fn(self, name, documentation, fn):
+        return self.register(GaugeFunction(name, documentation, fn))
+
+    def counter_fn(self, name, documentation, fn):
+        return self.register(CounterFunction(name, documentation, fn))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'recogniser_request_duration_seconds', 'Длительность RPC', ('method', 'code'))
+QUEUE_WAIT = REGISTRY.histogram(
+    'recogniser_queue_wait_seconds', 'Ожидание запроса в очереди планировщика')
+INFERENCE_TIME = REGISTRY.histogram(
+    'recogniser_inference_duration_seconds', 'Время одного вызова инференса')
+STROKE_POINTS = REGISTRY.histogram(
+    'recogniser_stroke_points', 'Число точек во входном штрихе', buckets=POINTS_BUCKETS)
+BATCH_SIZE = REGISTRY.histogram(
+    'recogniser_batch_strokes', 'Число штрихов в одном вызове инференса', buckets=BATCH_BUCKETS)
+ERRORS = REGISTRY.counter(
+    'recogniser_errors_total', 'Запросы, завершившиеся ошибкой', ('method', 'code'))
+
+
+def start_metrics_server(port, health_fn=None, host='0.0.0.0'):
+    """HTTP-сервер /metrics и /healthz в фоновом потоке"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body = REGISTRY.render().encode()
+                self._reply(200, body, 'text/plain; version=0.0.4; charset=utf-8')
+            elif self.path == '/healthz':
+                health = health_fn() if health_fn else {'status': 'ok'}
+                code = 200 if health.get('status') == 'ok' else 503
+                self._reply(code, json.dumps(health).encode(), 'application/json')
+            else:
+                self._reply(404, b'not found\n', 'text/plain')
+
+        def _reply(self, code, body, content_type):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Каждый scrape в лог не пишем
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
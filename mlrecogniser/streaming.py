@@ -0,0 +1,98 @@
+import numpy as np
+
+import handwriting_pb2
+from trajectory_smoother import array_to_packed, array_to_points, stroke_to_array
+
+
+class TooManyStrokesError(Exception):
+    """В потоке открыто больше незавершённых штрихов, чем разрешено"""
+
+
+class StreamingSmoother:
+    """Инкрементальное сглаживание одного штриха
+
+    Точка считается окончательной, когда справа от неё пришло receptive_radius
+    точек: дальнейшие точки на её выход уже не влияют. Каждый новый фрагмент
+    прогоняется через модель вместе с receptive_radius уже выданными точками
+    слева, поэтому стоимость фрагмента не зависит от длины штриха.
+
+    Нормализация ведётся по ограничивающему прямоугольнику уже полученных
+    точек, поэтому результат может немного отличаться от Recognize, где
+    прямоугольник известен для всего штриха сразу.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.radius = processor.model.receptive_radius()
+        self.tail = np.empty((0, 2), dtype=np.float64)
+        self.tail_start = 0
+        self.emitted = 0
+        self.total = 0
+        self.lo = None
+        self.hi = None
+
+    def push(self, coords, end=False):
+        """Добавляет точки и возвращает (offset, точки), ставшие окончательными"""
+        if len(coords):
+            self.tail = np.concatenate([self.tail, coords])
+            self.total += len(coords)
+            lo = coords.min(axis=0)
+            hi = coords.max(axis=0)
+            self.lo = lo if self.lo is None else np.minimum(self.lo, lo)
+            self.hi = hi if self.hi is None else np.maximum(self.hi, hi)
+
+        stop = self.total if end else self.total - self.radius
+        offset = self.emitted
+        if stop <= offset:
+            return offset, np.empty((0, 2), dtype=np.float64)
+
+        begin = offset - self.tail_start
+        count = stop - offset
+        span = self.hi - self.lo
+        if (end and self.total < 3) or span[0] < 1e-8 or span[1] < 1e-8:
+            # Как и в Recognize: короткие и вырожденные штрихи не сглаживаются
+            result = self.tail[begin:begin + count].copy()
+        else:
+            window = (self.tail - self.lo) / (span + 1e-8)
+            smoothed = self.processor.smooth_normalized(window)
+            result = smoothed[begin:begin + count] * span + self.lo
+
+        # Слева оставляем только контекст, нужный для следующих точек
+        self.emitted = stop
+        new_start = max(0, stop - self.radius)
+        self.tail = self.tail[new_start - self.tail_start:]
+        self.tail_start = new_start
+        return offset, result
+
+
+class StreamSession:
+    """Состояние одного вызова SmoothStream: открытые штрихи по stroke_id"""
+
+    def __init__(self, processor, max_strokes):
+        self.processor = processor
+        self.max_strokes = max_strokes
+        self.strokes = {}
+
+    def handle(self, chunk):
+        """Обрабатывает фрагмент и возвращает SmoothedChunk или None, если ответить нечем"""
+        smoother = self.strokes.get(chunk.stroke_id)
+        if smoother is None:
+            if len(self.strokes) >= self.max_strokes:
+                raise TooManyStrokesError(
+                    f"Открыто слишком много штрихов в потоке ({self.max_strokes})")
+            smoother = StreamingSmoother(self.processor)
+            self.strokes[chunk.stroke_id] = smoother
+
+        offset, coords = smoother.push(stroke_to_array(chunk), end=chunk.end)
+        if chunk.end:
+            del self.strokes[chunk.stroke_id]
+        elif not len(coords):
+            return None
+
+        smoothed_chunk = handwriting_pb2.SmoothedChunk(
+            stroke_id=chunk.stroke_id, offset=offset, end=chunk.end)
+        if chunk.packed_points:
+            smoothed_chunk.packed_points = array_to_packed(coords)
+        else:
+            smoothed_chunk.points.extend(array_to_points(coords))
+        return smoothed_chunk
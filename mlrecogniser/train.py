@@ -0,0 +1,260 @@
+"""Обучение TrajectorySmoother отдельно от gRPC-сервера
+
+    python train.py --out checkpoints/trajectory_smoother.pt --batch-size 64 --workers 4
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+import torch.optim as optim
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+from checkpoint import save_checkpoint
+from config import settings
+from trajectory_smoother import TrajectorySmoother
+
+
+def synthetic_trajectory(rng, length):
+    """Одна синтетическая траектория: зашумлённая нормализованная и исходная"""
+    x = np.cumsum(rng.standard_normal(length) * 0.5)
+    y = np.cumsum(rng.standard_normal(length) * 0.5)
+
+    # Добавляем шум
+    x_noisy = x + rng.standard_normal(length) * 0.3
+    y_noisy = y + rng.standard_normal(length) * 0.3
+
+    # Нормализуем
+    x_norm = (x_noisy - x_noisy.min()) / (x_noisy.max() - x_noisy.min() + 1e-8)
+    y_norm = (y_noisy - y_noisy.min()) / (y_noisy.max() - y_noisy.min() + 1e-8)
+
+    return {
+        'noisy': np.column_stack([x_norm, y_norm]),
+        'clean': np.column_stack([x, y]),
+    }
+
+
+class SyntheticTrajectoryDataset(Dataset):
+    """Синтетические траектории, генерируемые по индексу
+
+    Длины известны заранее (нужны сэмплеру корзин), сами точки порождаются в
+    __getitem__ из генератора с зерном (seed, index), поэтому генерация
+    детерминирована и параллелится воркерами DataLoader.
+    """
+
+    def __init__(self, num_samples, seed=0, min_length=10, max_length=50):
+        self.seed = seed
+        self.lengths = np.random.default_rng(seed).integers(min_length, max_length, size=num_samples)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        rng = np.random.default_rng((self.seed, index))
+        return synthetic_trajectory(rng, int(self.lengths[index]))
+
+
+class LengthBucketBatchSampler(Sampler):
+    """Батчи из траекторий близкой длины, чтобы дополнение нулями было минимальным"""
+
+    def __init__(self, lengths, batch_size, bucket_width=8, shuffle=True, seed=0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.bucket_width = max(1, bucket_width)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _batches(self):
+        rng = np.random.default_rng((self.seed, self.epoch))
+        order = rng.permutation(len(self.lengths)) if self.shuffle else np.arange(len(self.lengths))
+        buckets = {}
+        for index in order:
+            buckets.setdefault(int(self.lengths[index]) // self.bucket_width, []).append(int(index))
+
+        batches = []
+        for key in sorted(buckets):
+            bucket = buckets[key]
+            batches.extend(bucket[i:i + self.batch_size] for i in range(0, len(bucket), self.batch_size))
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self):
+        return iter(self._batches())
+
+    def __len__(self):
+        return len(self._batches())
+
+
+def collate_padded(samples):
+    """Дополняет траектории батча нулями до общей длины и строит маску реальных точек"""
+    max_len = max(len(sample['noisy']) for sample in samples)
+    noisy = torch.zeros(len(samples), max_len, 2)
+    clean = torch.zeros(len(samples), max_len, 2)
+    mask = torch.zeros(len(samples), max_len, 1)
+    for row, sample in enumerate(samples):
+        n = len(sample['noisy'])
+        noisy[row, :n] = torch.from_numpy(sample['noisy'])
+        clean[row, :n] = torch.from_numpy(sample['clean'])
+        mask[row, :n] = 1.0
+    return noisy, clean, mask
+
+
+def masked_mse(output, target, mask):
+    """MSE только по реальным точкам, дополнение в ошибку не входит"""
+    squared = (output - target) ** 2 * mask
+    return squared.sum() / (mask.sum() * output.shape[-1]).clamp(min=1.0)
+
+
+def make_loader(dataset, batch_size, bucket_width, workers, shuffle, seed):
+    sampler = LengthBucketBatchSampler(dataset.lengths, batch_size, bucket_width, shuffle, seed)
+    loader = DataLoader(
+        dataset,
+        batch_sampler=sampler,
+        collate_fn=collate_padded,
+        num_workers=workers,
+        persistent_workers=workers > 0,
+    )
+    return loader, sampler
+
+
+def evaluate(model, loader, device):
+    model.eval()
+    total, count = 0.0, 0
+    with torch.no_grad():
+        for noisy, clean, mask in loader:
+            noisy, clean, mask = noisy.to(device), clean.to(device), mask.to(device)
+            total += masked_mse(model(noisy, mask), clean, mask).item() * len(noisy)
+            count += len(noisy)
+    return total / max(count, 1)
+
+
+def train_model(model, num_samples=1000, val_samples=200, epochs=50, batch_size=32, bucket_width=8,
+                workers=0, lr=0.001, patience=5, min_delta=1e-5, seed=0, device=None, log=print):
+    """Обучает модель мини-батчами с ранней остановкой по валидационной ошибке
+
+    Возвращает отчёт с историей потерь и временем обучения; в модели остаются
+    веса лучшей по валидации эпохи.
+    """
+    device = device or torch.device('cpu')
+    model.to(device)
+    train_loader, train_sampler = make_loader(
+        SyntheticTrajectoryDataset(num_samples, seed=seed), batch_size, bucket_width, workers, True, seed)
+    val_loader, _ = make_loader(
+        SyntheticTrajectoryDataset(val_samples, seed=seed + 1), batch_size, bucket_width, workers, False, seed)
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+
+    best_loss = float('inf')
+    best_state = None
+    best_epoch = 0
+    history = []
+    started = time.perf_counter()
+
+    for epoch in range(epochs):
+        epoch_started = time.perf_counter()
+        train_sampler.set_epoch(epoch)
+        model.train()
+        total, count = 0.0, 0
+        for noisy, clean, mask in train_loader:
+            noisy, clean, mask = noisy.to(device), clean.to(device), mask.to(device)
+            optimizer.zero_grad()
+            loss = masked_mse(model(noisy, mask), clean, mask)
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(noisy)
+            count += len(noisy)
+
+        train_loss = total / max(count, 1)
+        val_loss = evaluate(model, val_loader, device)
+        history.append({
+            'epoch': epoch + 1,
+            'train_loss': train_loss,
+            'val_loss': val_loss,
+            'seconds': time.perf_counter() - epoch_started,
+        })
+        log(f"Epoch {epoch + 1}/{epochs}, Loss: {train_loss:.6f}, Val: {val_loss:.6f}, "
+            f"{history[-1]['seconds']:.2f} s")
+
+        if val_loss < best_loss - min_delta:
+            best_loss = val_loss
+            best_epoch = epoch + 1
+            best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+        elif epoch + 1 - best_epoch >= patience:
+            log(f"Ранняя остановка: {patience} эпох без улучшения")
+            break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    model.eval()
+
+    wall_clock = time.perf_counter() - started
+    return {
+        'epochs_run': len(history),
+        'best_epoch': best_epoch,
+        'best_val_loss': best_loss,
+        'wall_clock_seconds': wall_clock,
+        'samples_per_second': num_samples * len(history) / wall_clock if wall_clock else 0.0,
+        'batch_size': batch_size,
+        'history': history,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default=settings.MODEL_CHECKPOINT_PATH, help='путь чекпоинта')
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--val-samples', type=int, default=200)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--bucket-width', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=0, help='процессы генерации данных')
+    parser.add_argument('--threads', type=int, default=0, help='потоки torch, 0 - по умолчанию')
+    parser.add_argument('--lr', type=float, default=0.001)
+    parser.add_argument('--patience', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hidden-channels', type=int, default=32)
+    parser.add_argument('--version', help='версия модели в чекпоинте, по умолчанию - время')
+    parser.add_argument('--report', help='куда сохранить отчёт об обучении в JSON')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+    model = TrajectorySmoother(hidden_channels=args.hidden_channels)
+    report = train_model(
+        model,
+        num_samples=args.samples,
+        val_samples=args.val_samples,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        bucket_width=args.bucket_width,
+        workers=args.workers,
+        lr=args.lr,
+        patience=args.patience,
+        seed=args.seed,
+        device=device,
+    )
+
+    metadata = {k: v for k, v in report.items() if k != 'history'}
+    version = save_checkpoint(model, args.out, model_version=args.version, metadata=metadata)
+    report['model_version'] = version
+    report['checkpoint'] = args.out
+    print(f"Обучение заняло {report['wall_clock_seconds']:.2f} s "
+          f"({report['samples_per_second']:.0f} траекторий/с), "
+          f"лучшая эпоха {report['best_epoch']}, val {report['best_val_loss']:.6f}")
+    print(f"Чекпоинт {args.out}, версия {version}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,134 +1,329 @@
+import logging
+import os
+import threading
+from typing import NamedTuple, Optional
+
 import torch
 import torch.nn as nn
-import torch.optim as optim
 import numpy as np
 import handwriting_pb2
+from backends import build_runner
+from checkpoint import CheckpointError, load_checkpoint, save_checkpoint
+from classical import classical_smooth, is_simple_stroke, rdp_simplify, simplify_tolerance
+from config import settings
+
+logger = logging.getLogger(__name__)
 
 class TrajectorySmoother(nn.Module):
     def __init__(self, input_channels=2, hidden_channels=32):
         super().__init__()
+        self.input_channels = input_channels
+        self.hidden_channels = hidden_channels
         self.conv1 = nn.Conv1d(input_channels, hidden_channels, kernel_size=5, padding=2)
         self.conv2 = nn.Conv1d(hidden_channels, hidden_channels, kernel_size=3, padding=1)
         self.conv3 = nn.Conv1d(hidden_channels, input_channels, kernel_size=5, padding=2)
         self.relu = nn.ReLU()
         self.dropout = nn.Dropout(0.1)
         
-    def forward(self, x):
+    def forward(self, x, mask: Optional[torch.Tensor] = None):
         # x shape: (batch, points, 2) -> (batch, 2, points)
+        # mask shape: (batch, points, 1), 1 для реальных точек и 0 для дополнения.
+        # Обнуление дополнения после каждого слоя делает результат батча с
+        # разными длинами идентичным поштучному прогону каждой траектории.
         x = x.transpose(1, 2)
+        if mask is not None:
+            mask = mask.transpose(1, 2)
         x = self.relu(self.conv1(x))
         x = self.dropout(x)
+        if mask is not None:
+            x = x * mask
         x = self.relu(self.conv2(x))
         x = self.dropout(x)
+        if mask is not None:
+            x = x * mask
         x = self.conv3(x)
         return x.transpose(1, 2)
 
+    def receptive_radius(self):
+        """Сколько соседних точек с каждой стороны влияет на выход в одной точке"""
+        return sum((conv.kernel_size[0] - 1) // 2 for conv in (self.conv1, self.conv2, self.conv3))
+
+    def config(self):
+        """Параметры конструктора, необходимые для восстановления модели из чекпоинта"""
+        return {
+            'input_channels': self.input_channels,
+            'hidden_channels': self.hidden_channels,
+        }
+
+
+class LoadedModel(NamedTuple):
+    """Модель вместе с версией весов; заменяется целиком одним присваиванием"""
+    model: TrajectorySmoother
+    version: str
+    # Вызываемый объект runner(x, mask) выбранного бэкенда, собранный из model
+    runner: object
+
+
 class TrajectoryProcessor:
-    def __init__(self):
-        self.model = TrajectorySmoother()
+    def __init__(self, checkpoint_path=None, train_if_missing=None, backend=None):
+        self.backend = backend or settings.INFERENCE_BACKEND
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model.to(self.device)
-        self.model.eval()
+        if self.backend in ('int8', 'onnx'):
+            self.device = torch.device('cpu')  # Эти бэкенды работают только на CPU
+        self.checkpoint_path = checkpoint_path or settings.MODEL_CHECKPOINT_PATH
+        if train_if_missing is None:
+            train_if_missing = settings.MODEL_TRAIN_IF_MISSING
+        self.train_if_missing = train_if_missing
+        self._swap_lock = threading.Lock()
+        self._loaded = None
         
         # Загружаем предобученную модель или обучаем на синтетических данных
         self._initialize_model()
+
+    @property
+    def model(self):
+        return self._loaded.model
+
+    @property
+    def runner(self):
+        return self._loaded.runner
+
+    @property
+    def model_version(self):
+        return self._loaded.version
     
     def _initialize_model(self):
-        """Инициализируем модель на синтетических данных"""
-        print("Инициализация модели TrajectorySmoother...")
-        
-        # Генерируем синтетические траектории для обучения
-        synthetic_trajectories = self._generate_synthetic_data()
-        
-        # Обучаем модель
-        self._train_model(synthetic_trajectories)
-        
-        print("Модель инициализирована!")
-    
-    def _generate_synthetic_data(self, num_samples=1000):
-        """Генерируем синтетические траектории для обучения"""
-        trajectories = []
-        
-        for _ in range(num_samples):
-            # Генерируем случайную траекторию
-            length = np.random.randint(10, 50)
-            x = np.cumsum(np.random.randn(length) * 0.5)
-            y = np.cumsum(np.random.randn(length) * 0.5)
-            
-            # Добавляем шум
-            x_noisy = x + np.random.randn(length) * 0.3
-            y_noisy = y + np.random.randn(length) * 0.3
-            
-            # Нормализуем
-            x_norm = (x_noisy - x_noisy.min()) / (x_noisy.max() - x_noisy.min() + 1e-8)
-            y_norm = (y_noisy - y_noisy.min()) / (y_noisy.max() - y_noisy.min() + 1e-8)
-            
-            trajectories.append({
-                'noisy': np.column_stack([x_norm, y_norm]),
-                'clean': np.column_stack([x, y])
-            })
-        
-        return trajectories
-    
-    def _train_model(self, trajectories, epochs=50):
-        """Обучаем модель на синтетических данных"""
-        criterion = nn.MSELoss()
-        optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+        """Загружаем модель из чекпоинта, при его отсутствии обучаем на синтетических данных"""
+        try:
+            version = self.load_model(self.checkpoint_path)
+            logger.info("Модель TrajectorySmoother загружена",
+                        extra={'checkpoint': self.checkpoint_path, 'model_version': version})
+            return
+        except CheckpointError as ex:
+            # Повреждённый или несовместимый файл - ошибка, а не повод обучить замену и затереть его
+            if not self.train_if_missing or os.path.exists(self.checkpoint_path):
+                raise
+            logger.warning("%s. Обучаю модель на синтетических данных", ex)
+
+        model = TrajectorySmoother().to(self.device)
         
-        for epoch in range(epochs):
-            total_loss = 0
-            for trajectory in trajectories:
-                noisy = torch.tensor(trajectory['noisy'], dtype=torch.float32).unsqueeze(0).to(self.device)
-                clean = torch.tensor(trajectory['clean'], dtype=torch.float32).unsqueeze(0).to(self.device)
-                
-                optimizer.zero_grad()
-                output = self.model(noisy)
-                loss = criterion(output, clean)
-                loss.backward()
-                optimizer.step()
-                
-                total_loss += loss.item()
-            
-            if (epoch + 1) % 10 == 0:
-                print(f"Epoch {epoch+1}/{epochs}, Loss: {total_loss/len(trajectories):.6f}")
+        # Обучаем модель мини-батчами на синтетических траекториях
+        from train import train_model
+        report = train_model(model, device=self.device, log=logger.info)
+        logger.info("Модель обучена", extra={k: v for k, v in report.items() if k != 'history'})
+
+        version = "synthetic"
+        # Файл мог появиться за время обучения (другой процесс, trainer) - его не перезаписываем
+        if settings.MODEL_SAVE_AFTER_TRAIN and not os.path.exists(self.checkpoint_path):
+            metadata = {'source': 'startup', 'best_val_loss': report['best_val_loss']}
+            version = save_checkpoint(model, self.checkpoint_path, metadata=metadata)
+            logger.info("Чекпоинт сохранён", extra={'checkpoint': self.checkpoint_path, 'model_version': version})
+        self.swap_model(model, version)
+
+    def load_model(self, path=None):
+        """Загружает веса из чекпоинта и атомарно подменяет ими текущую модель"""
+        payload = load_checkpoint(path or self.checkpoint_path, map_location=self.device)
+        model = TrajectorySmoother(**payload['model_config'])
+        model.load_state_dict(payload['state_dict'])
+        model.to(self.device)
+        model.eval()
+        self.swap_model(model, payload['model_version'])
+        return payload['model_version']
+
+    def swap_model(self, model, version):
+        """Подменяет модель; запросы, уже начавшие инференс, дорабатывают на старых весах"""
+        # Бэкенд собирается до захвата блокировки, чтобы замена оставалась мгновенной
+        runner = build_runner(model, self.backend)
+        with self._swap_lock:
+            self._loaded = LoadedModel(model=model, version=str(version), runner=runner)
     
     def smooth_trajectory(self, points):
         """Сглаживает траекторию с помощью обученной модели"""
-        if len(points) < 3:
-            return points
-        
-        # Преобразуем точки в numpy массив
-        coords = np.array([[p.x, p.y] for p in points])
-        
-        # Нормализуем координаты
-        x_min, y_min = coords.min(axis=0)
-        x_max, y_max = coords.max(axis=0)
-        
-        if x_max - x_min < 1e-8 or y_max - y_min < 1e-8:
-            return points  # Слишком мало точек для обработки
-        
-        coords_norm = (coords - coords.min(axis=0)) / (coords.max(axis=0) - coords.min(axis=0) + 1e-8)
-        
-        # Преобразуем в тензор
-        coords_tensor = torch.tensor(coords_norm, dtype=torch.float32).unsqueeze(0).to(self.device)
-        
-        # Применяем модель
+        coords = points_to_array(points)
+        smoothed = self.smooth_arrays([coords])[0]
+        if smoothed is coords:
+            return points  # Траектория возвращена без изменений
+        return array_to_points(smoothed)
+
+    def smooth_trajectories(self, strokes):
+        """Сглаживает несколько траекторий за один проход модели на каждую корзину длин"""
+        coords = [points_to_array(points) for points in strokes]
+        smoothed = self.smooth_arrays(coords)
+        return [
+            points if result is source else array_to_points(result)
+            for points, source, result in zip(strokes, coords, smoothed)
+        ]
+
+    def smooth_arrays(self, strokes):
+        """Сглаживает список траекторий вида (N, 2) и возвращает список массивов (M, 2)
+
+        Короткие, почти прямые или уже чистые траектории при CLASSICAL_ENABLED
+        сглаживаются фильтром Савицкого-Голея и упрощаются RDP, поэтому точек в
+        ответе может стать меньше. Остальные группируются по длине в корзины
+        шириной INFERENCE_BUCKET_WIDTH, каждая корзина дополняется нулями до
+        максимальной длины и прогоняется через модель одним батчем. Траектории
+        длиннее INFERENCE_WINDOW_POINTS режутся на перекрывающиеся окна (см.
+        _smooth_windowed). Траектории, которые модель не обрабатывает (меньше 3
+        точек или вырожденные по одной из осей), возвращаются как есть.
+        """
+        loaded = self._loaded
+        window = settings.INFERENCE_WINDOW_POINTS
+        results = list(strokes)
+        pending = []
+        for i, coords in enumerate(strokes):
+            if len(coords) < 3:
+                continue
+            lo = coords.min(axis=0)
+            span = coords.max(axis=0) - lo
+            if span[0] < 1e-8 or span[1] < 1e-8:
+                continue  # Вырожденная траектория, сглаживать нечего
+            if settings.CLASSICAL_ENABLED and is_simple_stroke(
+                    coords,
+                    settings.CLASSICAL_MAX_POINTS,
+                    settings.CLASSICAL_MIN_STRAIGHTNESS,
+                    settings.CLASSICAL_MAX_JITTER):
+                results[i] = classical_smooth(
+                    coords,
+                    settings.CLASSICAL_SG_WINDOW,
+                    settings.CLASSICAL_SG_POLYORDER,
+                    settings.SIMPLIFY_EPSILON)
+                continue
+            pending.append((i, lo, span))
+
+        if not pending:
+            return results
+
+        # Длинные траектории идут окнами, остальные - батчами по корзинам длин
+        long_strokes = [item for item in pending if window and len(strokes[item[0]]) > window]
+        for i, lo, span in long_strokes:
+            coords_norm = (strokes[i] - lo) / (span + 1e-8)
+            results[i] = self._smooth_windowed(loaded, coords_norm) * span + lo
+
+        # Корзины по длине: внутри корзины лишние нули добавляются не более чем на ширину корзины
+        width = max(1, settings.INFERENCE_BUCKET_WIDTH)
+        buckets = {}
+        for item in pending:
+            if window and len(strokes[item[0]]) > window:
+                continue
+            buckets.setdefault((len(strokes[item[0]]) - 1) // width, []).append(item)
+
+        runner = loaded.runner
+        max_batch = max(1, settings.INFERENCE_MAX_BATCH)
+        for key in sorted(buckets):
+            bucket = buckets[key]
+            for start in range(0, len(bucket), max_batch):
+                self._smooth_bucket(runner, strokes, bucket[start:start + max_batch], results)
+
+        if settings.SIMPLIFY_MODEL_OUTPUT:
+            for i, _, _ in pending:
+                results[i] = rdp_simplify(results[i], simplify_tolerance(strokes[i], settings.SIMPLIFY_EPSILON))
+
+        return results
+
+    def smooth_normalized(self, coords_norm):
+        """Прогоняет через модель одну уже нормализованную траекторию (N, 2)"""
+        loaded = self._loaded
+        window = settings.INFERENCE_WINDOW_POINTS
+        if window and len(coords_norm) > window:
+            return self._smooth_windowed(loaded, coords_norm)
+        coords_tensor = torch.from_numpy(np.ascontiguousarray(coords_norm, dtype=np.float32))
+        coords_tensor = coords_tensor.unsqueeze(0).to(self.device)
+        mask_tensor = torch.ones(1, coords_tensor.shape[1], 1, device=self.device)
         with torch.no_grad():
-            smoothed_norm = self.model(coords_tensor)
-        
-        # Денормализуем
-        smoothed_coords = smoothed_norm.squeeze(0).cpu().numpy()
-        smoothed_coords = smoothed_coords * (coords.max(axis=0) - coords.min(axis=0)) + coords.min(axis=0)
-        
-        # Преобразуем обратно в точки
-        result = []
-        for i in range(len(smoothed_coords)):
-            result.append(handwriting_pb2.Point(
-                x=float(smoothed_coords[i, 0]),
-                y=float(smoothed_coords[i, 1])
-            ))
-        
-        return result
+            smoothed = loaded.runner(coords_tensor, mask_tensor)
+        return smoothed.squeeze(0).cpu().numpy().astype(np.float64)
+
+    def _smooth_windowed(self, loaded, coords_norm):
+        """Инференс длинной нормализованной траектории перекрывающимися окнами
+
+        Каждое окно содержит до INFERENCE_WINDOW_POINTS точек: ядро и по
+        receptive_radius точек контекста с каждой стороны. Выход в точке ядра
+        зависит только от точек в пределах радиуса, поэтому склеенные ядра
+        совпадают с прогоном всей траектории целиком, а память одного прохода
+        ограничена INFERENCE_MAX_BATCH окнами вне зависимости от длины штриха.
+        """
+        n = len(coords_norm)
+        radius = loaded.model.receptive_radius()
+        window = max(settings.INFERENCE_WINDOW_POINTS, 4 * radius + 1)
+        core = window - 2 * radius
+        starts = list(range(0, n, core))
+        max_batch = max(1, settings.INFERENCE_MAX_BATCH)
+        output = np.empty((n, 2), dtype=np.float64)
+
+        for group_start in range(0, len(starts), max_batch):
+            group = starts[group_start:group_start + max_batch]
+            bounds = [(max(0, s - radius), min(n, s + core + radius)) for s in group]
+            width = max(hi - lo for lo, hi in bounds)
+            batch = np.zeros((len(group), width, 2), dtype=np.float32)
+            mask = np.zeros((len(group), width, 1), dtype=np.float32)
+            for row, (lo, hi) in enumerate(bounds):
+                batch[row, :hi - lo] = coords_norm[lo:hi]
+                mask[row, :hi - lo] = 1.0
+
+            batch_tensor = torch.from_numpy(batch).to(self.device)
+            mask_tensor = torch.from_numpy(mask).to(self.device)
+            with torch.no_grad():
+                smoothed = loaded.runner(batch_tensor, mask_tensor).cpu().numpy()
+
+            # Из каждого окна берём только ядро, контекст отбрасываем
+            for row, (s, (lo, _)) in enumerate(zip(group, bounds)):
+                end = min(n, s + core)
+                output[s:end] = smoothed[row, s - lo:end - lo]
+        return output
+
+    def _smooth_bucket(self, runner, strokes, bucket, results):
+        """Один проход модели по корзине траекторий с маской дополнения"""
+        max_len = max(len(strokes[i]) for i, _, _ in bucket)
+        batch = np.zeros((len(bucket), max_len, 2), dtype=np.float32)
+        mask = np.zeros((len(bucket), max_len, 1), dtype=np.float32)
+        for row, (i, lo, span) in enumerate(bucket):
+            n = len(strokes[i])
+            batch[row, :n] = (strokes[i] - lo) / (span + 1e-8)
+            mask[row, :n] = 1.0
+
+        batch_tensor = torch.from_numpy(batch).to(self.device)
+        mask_tensor = torch.from_numpy(mask).to(self.device)
+        with torch.no_grad():
+            smoothed_norm = runner(batch_tensor, mask_tensor).cpu().numpy()
+
+        # Убираем дополнение и денормализуем каждую траекторию
+        for row, (i, lo, span) in enumerate(bucket):
+            n = len(strokes[i])
+            results[i] = smoothed_norm[row, :n].astype(np.float64) * span + lo
+
+
+# Формат поля packed_points: x0, y0, x1, y1, ... little-endian float32
+PACKED_DTYPE = np.dtype('<f4')
+
+
+def packed_to_array(data):
+    """Декодирует packed_points в массив (N, 2) без копирования буфера"""
+    if len(data) % (2 * PACKED_DTYPE.itemsize):
+        raise ValueError(f"Длина packed_points ({len(data)} байт) не кратна размеру точки")
+    return np.frombuffer(data, dtype=PACKED_DTYPE).reshape(-1, 2)
+
+
+def array_to_packed(coords):
+    """Кодирует массив (N, 2) в packed_points"""
+    return np.ascontiguousarray(coords, dtype=PACKED_DTYPE).tobytes()
+
+
+def stroke_to_array(message):
+    """Точки DrawPayload или StrokeChunk: packed_points, если заполнено, иначе points"""
+    if message.packed_points:
+        return packed_to_array(message.packed_points)
+    return points_to_array(message.points)
+
+
+def points_to_array(points):
+    """Преобразует repeated Point в массив координат (N, 2)"""
+    return np.array([(p.x, p.y) for p in points], dtype=np.float64).reshape(-1, 2)
+
+
+def array_to_points(coords):
+    """Преобразует массив координат (N, 2) в список Point"""
+    return [handwriting_pb2.Point(x=x, y=y) for x, y in coords.tolist()]
+
 
 # Глобальный экземпляр процессора
 trajectory_processor = None
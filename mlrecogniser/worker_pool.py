@@ -0,0 +1,339 @@
+import atexit
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+from concurrent import futures
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Координаты передаются через разделяемую память как float64, как и внутри процессора
+_DTYPE = np.dtype(np.float64)
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(index, conn, shm_name, capacity, num_threads, cores, checkpoint_path):
+    """Точка входа процесса инференса: своя копия модели, свои потоки и ядра"""
+    import torch
+    from logs import configure_logging
+    from trajectory_smoother import TrajectoryProcessor
+
+    configure_logging()
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(num_threads)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffer = np.ndarray((capacity, 2), dtype=_DTYPE, buffer=shm.buf)
+    try:
+        try:
+            processor = TrajectoryProcessor(checkpoint_path=checkpoint_path, train_if_missing=False)
+        except Exception as ex:
+            conn.send(("error", f"{type(ex).__name__}: {ex}"))
+            return
+        conn.send(("ready", processor.model_version))
+
+        while True:
+            command, arg = conn.recv()
+            if command == "stop":
+                break
+            try:
+                if command == "smooth":
+                    # Траектории лежат в разделяемой памяти подряд, arg - их длины
+                    offsets = np.cumsum([0] + arg)
+                    strokes = [buffer[offsets[i]:offsets[i + 1]] for i in range(len(arg))]
+                    results = processor.smooth_arrays(strokes)
+                    # Результаты пишутся подряд с начала буфера; они не длиннее входа,
+                    # поэтому запись не затирает ещё не скопированные траектории
+                    position = 0
+                    for result in results:
+                        buffer[position:position + len(result)] = result
+                        position += len(result)
+                    conn.send(("ok", [len(result) for result in results]))
+                elif command == "smooth_inline":
+                    # Батч не поместился в буфер и пришёл через pipe
+                    conn.send(("ok", processor.smooth_arrays(arg)))
+                elif command == "reload":
+                    conn.send(("ok", processor.load_model(arg)))
+                else:
+                    conn.send(("error", f"Неизвестная команда {command}"))
+            except Exception as ex:
+                conn.send(("error", f"{type(ex).__name__}: {ex}"))
+    finally:
+        del buffer
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, index, process, conn, shm, capacity):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.shm = shm
+        self.capacity = capacity
+        self.buffer = np.ndarray((capacity, 2), dtype=_DTYPE, buffer=shm.buf)
+        self.lock = threading.Lock()
+
+    def call(self, command, arg=None):
+        self.conn.send((command, arg))
+        status, result = self.conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"Процесс инференса {self.index}: {result}")
+        return result
+
+
+class InferenceWorkerPool:
+    """Пул процессов инференса с обменом траекториями через разделяемую память
+
+    Каждый процесс держит свою копию модели, ограничен num_threads потоками
+    torch и, если pin_cores включён, закреплён за своими ядрами. Батч делится
+    между процессами по суммарному числу точек и обрабатывается параллельно,
+    поэтому пропускная способность растёт с числом ядер, а не упирается в GIL.
+    Интерфейс совпадает с TrajectoryProcessor: smooth_arrays, load_model,
+    model_version.
+    """
+
+    def __init__(self, num_workers, checkpoint_path, threads_per_worker=1, pin_cores=True,
+                 buffer_points=1 << 16, min_shard_points=512, ready_timeout=120.0, respawn_retry_seconds=5.0):
+        self.num_workers = num_workers
+        # Сколько ждать загрузки модели перезапущенным процессом и как часто повторять неудачный перезапуск
+        self.ready_timeout = ready_timeout
+        self.respawn_retry_seconds = respawn_retry_seconds
+        self.min_shard_points = min_shard_points
+        self.checkpoint_path = checkpoint_path
+        # Веса, с которыми поднимается перезапущенный процесс (меняется в load_model)
+        self._model_path = checkpoint_path
+        self.threads_per_worker = threads_per_worker
+        self.buffer_points = buffer_points
+        self.model_version = None
+        self.respawns = 0
+        self._workers = []
+        self._idle = queue.Queue()
+        # Процессы, которые не удалось перезапустить: в пуле их нет, перезапуск повторяется по таймеру
+        self._dead = set()
+        self._timers = []
+        self._closed = False
+        self._dispatch = futures.ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="dispatch")
+        self._ctx = mp.get_context("spawn")
+
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        self._cores = []
+        for index in range(num_workers):
+            cores = None
+            if pin_cores and available:
+                start = index * threads_per_worker
+                cores = {available[(start + k) % len(available)] for k in range(threads_per_worker)}
+            self._cores.append(cores)
+
+            shm = shared_memory.SharedMemory(create=True, size=buffer_points * 2 * _DTYPE.itemsize)
+            process, conn = self._spawn(index, shm)
+            self._workers.append(_Worker(index, process, conn, shm, buffer_points))
+
+        for worker in self._workers:
+            try:
+                self.model_version = self._wait_ready(worker)
+            except RuntimeError:
+                self.close()
+                raise
+            self._idle.put(worker)
+
+        atexit.register(self.close)
+
+    def _spawn(self, index, shm):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, child_conn, shm.name, self.buffer_points, self.threads_per_worker,
+                  self._cores[index], self._model_path),
+            name=f"inference-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    @staticmethod
+    def _wait_ready(worker, timeout=None):
+        if timeout is not None and not worker.conn.poll(timeout):
+            raise RuntimeError(f"Процесс инференса {worker.index} не загрузил модель за {timeout} с")
+        try:
+            status, result = worker.conn.recv()
+        except (EOFError, ConnectionResetError):
+            status, result = "error", "процесс завершился"
+        if status != "ready":
+            raise RuntimeError(f"Процесс инференса {worker.index} не запустился: {result}")
+        return result
+
+    def _respawn(self, worker):
+        """Заменяет упавший процесс новым на том же сегменте разделяемой памяти"""
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout=5)
+        worker.process, worker.conn = self._spawn(worker.index, worker.shm)
+        try:
+            self._wait_ready(worker, self.ready_timeout)
+        except RuntimeError:
+            if worker.process.is_alive():
+                worker.process.terminate()
+            raise
+        self.respawns += 1
+
+    def _mark_dead(self, worker):
+        """Убирает процесс из пула до успешного перезапуска в фоне"""
+        self._dead.add(worker.index)
+        self._schedule_respawn(worker)
+
+    def _schedule_respawn(self, worker):
+        if self._closed:
+            return
+        timer = threading.Timer(self.respawn_retry_seconds, self._retry_respawn, (worker,))
+        timer.daemon = True
+        self._timers = [t for t in self._timers if t.is_alive()] + [timer]
+        timer.start()
+
+    def _retry_respawn(self, worker):
+        if self._closed:
+            return
+        with worker.lock:
+            try:
+                self._respawn(worker)
+            except RuntimeError as ex:
+                logger.warning("Процесс инференса %d снова не перезапустился: %s", worker.index, ex)
+                self._schedule_respawn(worker)
+                return
+        logger.info("Процесс инференса %d перезапущен и возвращён в пул", worker.index)
+        self._dead.discard(worker.index)
+        self._idle.put(worker)
+
+    def _acquire(self):
+        """Свободный процесс; если живых не осталось, ошибка вместо вечного ожидания"""
+        while True:
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                if len(self._dead) >= len(self._workers):
+                    raise RuntimeError("Нет работающих процессов инференса")
+
+    def smooth_arrays(self, strokes):
+        """Сглаживает траектории, распределяя их по свободным процессам"""
+        strokes = list(strokes)
+        if not strokes:
+            return []
+
+        shards = self._split(strokes)
+        if len(shards) == 1:
+            return self._run(strokes)
+
+        results = [None] * len(strokes)
+        pending = [(indices, self._dispatch.submit(self._run, [strokes[i] for i in indices]))
+                   for indices in shards]
+        for indices, future in pending:
+            for i, result in zip(indices, future.result()):
+                results[i] = result
+        return results
+
+    def load_model(self, path=None):
+        """Поочерёдно перезагружает веса во всех процессах"""
+        path = path or self.checkpoint_path
+        version = None
+        for worker in self._workers:
+            # Не перезапущенный процесс поднимется сразу с новыми весами
+            if worker.index in self._dead:
+                continue
+            with worker.lock:
+                version = worker.call("reload", path)
+        self.model_version = version
+        self._model_path = path
+        return version
+
+    def close(self):
+        self._closed = True
+        for timer in self._timers:
+            timer.cancel()
+        for worker in self._workers:
+            try:
+                worker.conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.buffer = None
+            worker.shm.close()
+            worker.shm.unlink()
+        self._workers = []
+        self._dispatch.shutdown(wait=False)
+
+    def _split(self, strokes):
+        """Делит индексы траекторий на части с примерно равным числом точек"""
+        # Мелкие батчи не делим: пересылка дороже выигрыша от параллельности
+        total = sum(len(coords) for coords in strokes)
+        parts = min(self.num_workers, len(strokes), total // max(1, self.min_shard_points))
+        if parts <= 1:
+            return [list(range(len(strokes)))]
+        # Жадно: самая длинная из оставшихся траекторий уходит в самую лёгкую часть
+        order = sorted(range(len(strokes)), key=lambda i: len(strokes[i]), reverse=True)
+        shards = [[] for _ in range(parts)]
+        loads = [0] * parts
+        for i in order:
+            target = loads.index(min(loads))
+            shards[target].append(i)
+            loads[target] += len(strokes[i])
+        return [sorted(shard) for shard in shards if shard]
+
+    def _run(self, strokes):
+        worker = self._acquire()
+        healthy = True
+        try:
+            with worker.lock:
+                try:
+                    return self._run_on(worker, strokes)
+                except (EOFError, BrokenPipeError, ConnectionResetError) as ex:
+                    if worker.process.is_alive():
+                        raise
+                    exitcode = worker.process.exitcode
+                    # Упавший процесс не возвращаем в пул как есть, иначе на нём
+                    # будет падать каждый следующий запрос
+                    try:
+                        self._respawn(worker)
+                    except RuntimeError as respawn_error:
+                        healthy = False
+                        self._mark_dead(worker)
+                        raise RuntimeError(
+                            f"Процесс инференса {worker.index} завершился (код {exitcode}) "
+                            f"и не перезапустился: {respawn_error}"
+                        ) from ex
+                    raise RuntimeError(
+                        f"Процесс инференса {worker.index} завершился (код {exitcode}), перезапущен"
+                    ) from ex
+        finally:
+            if healthy:
+                self._idle.put(worker)
+
+    def _run_on(self, worker, strokes):
+        lengths = [len(coords) for coords in strokes]
+        total = sum(lengths)
+        if total > worker.capacity:
+            return worker.call("smooth_inline", [np.asarray(coords, dtype=_DTYPE) for coords in strokes])
+
+        offset = 0
+        for coords, n in zip(strokes, lengths):
+            worker.buffer[offset:offset + n] = coords
+            offset += n
+        result_lengths = worker.call("smooth", lengths)
+
+        results = []
+        offset = 0
+        for n in result_lengths:
+            results.append(worker.buffer[offset:offset + n].copy())
+            offset += n
+        return results
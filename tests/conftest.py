@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+from db.cache import LocalCacheBackend, entity_cache
+from db.database import Base
+from db.lib.types import utcnow
+
+
+@compiles(utcnow, "sqlite")
+def sqlite_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+class Database:
+    """Файловая sqlite со схемой моделей и счётчиками SELECT и COMMIT"""
+
+    def __init__(self, path):
+        self.url = f"sqlite+aiosqlite:///{path}"
+        self.selects = 0
+        self.commits = 0
+        self.sessions = None
+
+    def run(self, scenario):
+        """Выполняет scenario(db) в своём цикле событий с чистой базой"""
+        async def main():
+            engine = create_async_engine(self.url)
+            event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+            event.listen(engine.sync_engine, "commit", self._on_commit)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            self.sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+            try:
+                await scenario(self)
+            finally:
+                await engine.dispose()
+        asyncio.run(main())
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.selects += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(tmp_path / "test.db")
+
+
+@pytest.fixture(autouse=True)
+def local_entity_cache():
+    """Каждый тест начинает с пустого локального кэша строк"""
+    backend, enabled, stats = entity_cache.backend, entity_cache.enabled, entity_cache._stats
+    entity_cache.backend, entity_cache.enabled, entity_cache._stats = LocalCacheBackend(), True, {}
+    yield entity_cache
+    entity_cache.backend, entity_cache.enabled, entity_cache._stats = backend, enabled, stats
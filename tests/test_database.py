@@ -0,0 +1,315 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from common.jwt.hash import hash_password_async
+from db.cache import LocalCacheBackend, entity_cache
+from db.database import Base, unit_of_work
+from db.models.boards import Board
+from db.models.users import User
+
+
+def _user(email="user@example.com"):
+    return User(email=email, password="hash")
+
+
+def test_unit_of_work_commits_once_on_exit(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            d.commits = 0
+            async with unit_of_work(db):
+                await _user("a@example.com").save(db)
+                await _user("b@example.com").save(db)
+                assert d.commits == 0
+            assert d.commits == 1
+        async with d.sessions() as db:
+            assert len(await User.select_all(db)) == 2
+    database.run(scenario)
+
+
+def test_unit_of_work_rolls_back_on_error(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(db):
+                    await _user().save(db)
+                    raise RuntimeError
+        async with d.sessions() as db:
+            assert await User.select_all(db) == []
+    database.run(scenario)
+
+
+def test_nested_unit_of_work_joins_outer(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            d.commits = 0
+            with pytest.raises(RuntimeError):
+                async with unit_of_work(db):
+                    async with unit_of_work(db):
+                        await _user("a@example.com").save(db)
+                    assert d.commits == 0
+                    await _user("b@example.com").save(db)
+                    raise RuntimeError
+            assert d.commits == 0
+        async with d.sessions() as db:
+            assert await User.select_all(db) == []
+    database.run(scenario)
+
+
+def test_insert_returning_loads_server_defaults(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await User.insert_returning(db, {"email": "a@example.com", "password": "hash"})
+            assert user.user_uuid is not None
+            assert user.created_at is not None
+            boards = await Board.insert_returning(db, [
+                {"title": f"board {i}", "owner_id": user.user_uuid} for i in range(3)
+            ])
+            assert [board.title for board in boards] == ["board 0", "board 1", "board 2"]
+            assert await Board.insert_returning(db, []) == []
+    database.run(scenario)
+
+
+def test_save_all_and_bulk_delete_by_ids(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+            boards = await Board.save_all(db, [Board(title=f"b{i}", owner_id=user.user_uuid) for i in range(4)])
+            deleted = await Board.bulk_delete_by_ids(db, [boards[0].id, boards[1].id])
+            assert deleted == 2
+            assert await Board.bulk_delete_by_ids(db, []) == 0
+        async with d.sessions() as db:
+            assert {board.title for board in await Board.select_all(db)} == {"b2", "b3"}
+    database.run(scenario)
+
+
+class _RecordingSession:
+    """Сессия без БД: запоминает выражения, чтобы проверить SQL для PostgreSQL"""
+
+    def __init__(self):
+        self.info = {}
+        self.statements = []
+
+    async def execute(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return SimpleNamespace(rowcount=1)
+
+    async def scalars(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return SimpleNamespace(all=lambda: [])
+
+    async def commit(self):
+        pass
+
+    def sql(self):
+        return " ".join(str(self.statements[-1].compile(dialect=postgresql.dialect())).split())
+
+
+def _upsert_sql(**kwargs):
+    db = _RecordingSession()
+    rows = [{"email": "a@example.com", "password": "hash", "firstname": "Ann"}]
+    asyncio.run(User.bulk_upsert(db, rows, index_elements=["email"], **kwargs))
+    return db.sql()
+
+
+def test_bulk_upsert_updates_all_fields_except_key():
+    sql = _upsert_sql()
+    assert "ON CONFLICT (email) DO UPDATE SET" in sql
+    assert "password = excluded.password" in sql
+    assert "firstname = excluded.firstname" in sql
+    assert "email = excluded.email" not in sql
+    assert "updated_at = TIMEZONE('utc', CURRENT_TIMESTAMP)" in sql
+    assert "RETURNING" not in sql
+
+
+def test_bulk_upsert_updates_only_listed_fields():
+    sql = _upsert_sql(update_fields=["firstname"], returning=True)
+    assert "DO UPDATE SET firstname = excluded.firstname" in sql
+    assert "password = excluded.password" not in sql
+    assert "RETURNING" in sql
+
+
+def test_bulk_upsert_empty_update_fields_does_nothing():
+    sql = _upsert_sql(update_fields=[])
+    assert "ON CONFLICT (email) DO NOTHING" in sql
+
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL не задан")
+def test_bulk_upsert_on_postgres():
+    """Запускается на отдельной пустой базе: таблица user создаётся и удаляется"""
+    async def main():
+        engine = create_async_engine(TEST_POSTGRES_URL)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__])
+        sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        try:
+            async with sessions() as db:
+                rows = [{"email": f"{name}@example.com", "password": "hash", "firstname": name}
+                        for name in ("a", "b")]
+                assert await User.bulk_upsert(db, rows, index_elements=["email"]) == 2
+
+                rows = [{"email": "a@example.com", "password": "hash", "firstname": "Ann"},
+                        {"email": "c@example.com", "password": "hash", "firstname": "c"}]
+                users = await User.bulk_upsert(db, rows, index_elements=["email"],
+                                               update_fields=["firstname"], returning=True)
+                assert {user.email: user.firstname for user in users} == {
+                    "a@example.com": "Ann", "c@example.com": "c",
+                }
+
+                rows = [{"email": "b@example.com", "password": "hash", "firstname": "Bob"}]
+                assert await User.bulk_upsert(db, rows, index_elements=["email"], update_fields=[]) == 0
+                assert (await User.find_by_email(db, "b@example.com")).firstname == "b"
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all, tables=[User.__table__])
+            await engine.dispose()
+    asyncio.run(main())
+
+
+def test_bulk_upsert_without_rows_skips_query(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            assert await User.bulk_upsert(db, [], index_elements=["email"]) == 0
+            assert await User.bulk_upsert(db, [], index_elements=["email"], returning=True) == []
+    database.run(scenario)
+
+
+def test_find_by_id_reads_through_cache(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+        for _ in range(3):
+            async with d.sessions() as db:
+                found = await User.find_by_id(db, user.user_uuid)
+                assert found.email == user.email
+                assert found.created_at == user.created_at
+        counters = entity_cache.stats()["models"]["User"]
+        assert counters["misses"] == 1
+        assert counters["hits"] == 2
+    database.run(scenario)
+
+
+def test_find_by_expr_hit_skips_select(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+        async with d.sessions() as db:
+            await User.find_by_expr(db, User.email == user.email)
+        d.selects = 0
+        async with d.sessions() as db:
+            found = await User.find_by_expr(db, User.email == user.email)
+            assert found.user_uuid == user.user_uuid
+        assert d.selects == 0
+    database.run(scenario)
+
+
+def test_missing_row_is_not_cached(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            assert await User.find_by_expr(db, User.email == "a@example.com") is None
+        async with d.sessions() as db:
+            await User.insert_returning(db, {"email": "a@example.com", "password": "hash"})
+        async with d.sessions() as db:
+            assert await User.find_by_expr(db, User.email == "a@example.com") is not None
+    database.run(scenario)
+
+
+def test_save_invalidates_cached_rows(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+        async with d.sessions() as db:
+            found = await User.find_by_id(db, user.user_uuid)
+            found.firstname = "Ann"
+            await found.save(db)
+        async with d.sessions() as db:
+            assert (await User.find_by_id(db, user.user_uuid)).firstname == "Ann"
+            assert (await User.find_by_expr(db, User.email == user.email)).firstname == "Ann"
+    database.run(scenario)
+
+
+def test_unit_of_work_invalidates_after_commit(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+            key = await entity_cache.id_key(User, user.user_uuid)
+            async with unit_of_work(db):
+                user.firstname = "Ann"
+                await user.save(db)
+                await user.save(db)
+                assert await entity_cache.id_key(User, user.user_uuid) == key
+            assert await entity_cache.id_key(User, user.user_uuid) != key
+        assert entity_cache.stats()["models"]["User"]["invalidations"] == 2
+    database.run(scenario)
+
+
+def test_stale_put_after_invalidation_is_not_read(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+            # Чтение началось до записи и положило строку уже после сброса
+            stale_key = await entity_cache.id_key(User, user.user_uuid)
+            stale = User(**entity_cache.dump(user))
+            user.firstname = "Ann"
+            await user.save(db)
+            await entity_cache.put(User, stale_key, stale)
+        async with d.sessions() as db:
+            assert (await User.find_by_id(db, user.user_uuid)).firstname == "Ann"
+    database.run(scenario)
+
+
+def test_uncached_model_always_selects(database):
+    async def scenario(d):
+        async with d.sessions() as db:
+            user = await _user().save(db)
+            board = await Board(title="board", owner_id=user.user_uuid).save(db)
+        d.selects = 0
+        for _ in range(2):
+            async with d.sessions() as db:
+                assert (await Board.find_by_id(db, board.id)).title == "board"
+        assert d.selects == 2
+        assert "Board" not in entity_cache.stats()["models"]
+    database.run(scenario)
+
+
+class _FailingBackend(LocalCacheBackend):
+    async def incr(self, key: str) -> int:
+        raise ConnectionError("cache is down")
+
+
+def test_cache_failure_after_commit_is_not_a_write_failure(database, local_entity_cache):
+    local_entity_cache.backend = _FailingBackend()
+
+    async def scenario(d):
+        async with d.sessions() as db:
+            async with unit_of_work(db):
+                await _user("a@example.com").save(db)
+            await _user("b@example.com").save(db)
+        async with d.sessions() as db:
+            assert len(await User.select_all(db)) == 2
+    database.run(scenario)
+
+
+def test_password_hash_is_not_cached(database):
+    async def scenario(d):
+        password_hash = await hash_password_async("secret")
+        async with d.sessions() as db:
+            user = await User(email="a@example.com", password=password_hash).save(db)
+        async with d.sessions() as db:
+            await User.find_by_id(db, user.user_uuid)
+        key = await entity_cache.id_key(User, user.user_uuid)
+        cached = await entity_cache.backend.get(key)
+        assert cached["email"] == "a@example.com"
+        assert "password" not in cached
+        async with d.sessions() as db:
+            # Объект из кэша в сессии не мешает authenticate прочитать хэш из БД
+            await User.find_by_id(db, user.user_uuid)
+            assert await User.authenticate(db, email="a@example.com", password="secret")
+    database.run(scenario)
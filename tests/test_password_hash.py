@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from common.exceptions import ServiceUnavailableException
+from common.jwt.hash import PasswordHashPool
+
+
+def test_cancelled_request_keeps_slot_until_job_finishes():
+    async def scenario():
+        pool = PasswordHashPool(workers=1, queue_limit=0)
+        started, release = threading.Event(), threading.Event()
+
+        def job():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        task = asyncio.ensure_future(pool.run(job))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Поток всё ещё занят, поэтому новая операция не помещается в лимит
+        assert pool.stats()["pending"] == 1
+        with pytest.raises(ServiceUnavailableException):
+            await pool.run(job)
+
+        release.set()
+        for _ in range(100):
+            if pool.stats()["pending"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.stats()["pending"] == 0
+        assert await pool.run(lambda: "next") == "next"
+        pool.shutdown()
+    asyncio.run(scenario())
+
+
+def test_job_cancelled_before_start_releases_slot():
+    async def scenario():
+        pool = PasswordHashPool(workers=1, queue_limit=1)
+        release = threading.Event()
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        queued = asyncio.ensure_future(pool.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert pool.stats()["pending"] == 1
+        release.set()
+        await running
+        assert pool.stats()["pending"] == 0
+        pool.shutdown()
+    asyncio.run(scenario())
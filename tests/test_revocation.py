@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from common.jwt.revocation import RevocationSet
+from db.models.users import BlackListToken
+
+
+class _FlakySessions:
+    """Фабрика сессий, первые failures вызовов которой падают"""
+
+    def __init__(self, sessions, failures, error=RuntimeError):
+        self.sessions = sessions
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("db is down")
+        return self.sessions()
+
+
+async def _revoke(d, jti):
+    async with d.sessions() as db:
+        await BlackListToken(id=jti, expire=datetime.utcnow() + timedelta(hours=1)).save(db)
+
+
+def test_start_loads_revoked_tokens_before_serving(database):
+    async def scenario(d):
+        jti = uuid.uuid4()
+        await _revoke(d, jti)
+        revoked = RevocationSet(poll_seconds=60)
+        await revoked.start(d.sessions)
+        try:
+            assert revoked.loaded
+            assert revoked.is_revoked(str(jti))
+        finally:
+            await revoked.stop()
+    database.run(scenario)
+
+
+def test_load_retries_until_database_is_up(database):
+    async def scenario(d):
+        jti = uuid.uuid4()
+        await _revoke(d, jti)
+        sessions = _FlakySessions(d.sessions, failures=2, error=ValueError)
+        revoked = RevocationSet(poll_seconds=0)
+        await revoked.load(sessions, attempts=3)
+        assert sessions.calls == 3
+        assert revoked.is_revoked(str(jti))
+    database.run(scenario)
+
+
+def test_load_fails_after_attempts(database):
+    async def scenario(d):
+        revoked = RevocationSet(poll_seconds=0)
+        with pytest.raises(RuntimeError):
+            await revoked.load(_FlakySessions(d.sessions, failures=3), attempts=3)
+        assert not revoked.loaded
+    database.run(scenario)
+
+
+def test_poll_survives_unexpected_errors(database):
+    async def scenario(d):
+        revoked = RevocationSet(poll_seconds=0.01)
+        await revoked.start(d.sessions)
+        try:
+            revoked._task.cancel()
+            await asyncio.gather(revoked._task, return_exceptions=True)
+            sessions = _FlakySessions(d.sessions, failures=2, error=KeyError)
+            revoked._task = asyncio.create_task(revoked._poll(sessions))
+            jti = uuid.uuid4()
+            await _revoke(d, jti)
+            for _ in range(100):
+                if revoked.is_revoked(str(jti)):
+                    break
+                await asyncio.sleep(0.01)
+            assert sessions.calls > 2
+            assert revoked.is_revoked(str(jti))
+        finally:
+            await revoked.stop()
+    database.run(scenario)
@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+from auth.src.cache import TeamListCache
+from common.jwt import schemas
+from db.cache import LocalCacheBackend
+
+
+def _page(*team_ids):
+    now = datetime(2026, 1, 1)
+    return schemas.TeamPage(items=[
+        schemas.TeamSummary(id=team_id, name=f"team {i}", pool=2, status="accepted",
+                            member_count=1, created_at=now, updated_at=now)
+        for i, team_id in enumerate(team_ids)
+    ])
+
+
+async def _cached(cache, user_id, page):
+    _, generation = await cache.get(user_id, None, 20)
+    await cache.put(user_id, generation, None, 20, page, [item.id for item in page.items])
+
+
+def test_page_round_trip():
+    async def scenario():
+        cache = TeamListCache(LocalCacheBackend())
+        user_id, team_id = uuid.uuid4(), uuid.uuid4()
+        page = _page(team_id)
+        await _cached(cache, user_id, page)
+        cached, _ = await cache.get(user_id, None, 20)
+        assert cached == page
+        assert cache.stats()["hits"] == 1
+    asyncio.run(scenario())
+
+
+def test_invalidations_reach_other_processes():
+    async def scenario():
+        backend = LocalCacheBackend()
+        # Два экземпляра на одном бэкенде - как два воркера на общем redis
+        reader, writer = TeamListCache(backend), TeamListCache(backend)
+        user_id, team_id = uuid.uuid4(), uuid.uuid4()
+
+        await _cached(reader, user_id, _page(team_id))
+        await writer.invalidate_user(user_id)
+        assert (await reader.get(user_id, None, 20))[0] is None
+
+        await _cached(reader, user_id, _page(team_id))
+        await writer.invalidate_team(team_id)
+        assert (await reader.get(user_id, None, 20))[0] is None
+    asyncio.run(scenario())
+
+
+def test_page_read_before_invalidation_is_not_served():
+    async def scenario():
+        cache = TeamListCache(LocalCacheBackend())
+        user_id = uuid.uuid4()
+        _, generation = await cache.get(user_id, None, 20)
+        await cache.invalidate_user(user_id)
+        await cache.put(user_id, generation, None, 20, _page(uuid.uuid4()), [])
+        assert (await cache.get(user_id, None, 20))[0] is None
+    asyncio.run(scenario())
+
+
+class _FailingBackend(LocalCacheBackend):
+    async def incr(self, key: str) -> int:
+        raise ConnectionError("cache is down")
+
+
+def test_backend_failure_on_invalidation_is_logged_not_raised():
+    async def scenario():
+        cache = TeamListCache(_FailingBackend())
+        await cache.invalidate_user(uuid.uuid4())
+        await cache.invalidate_team(uuid.uuid4())
+        assert cache.stats()["invalidations"] == 0
+    asyncio.run(scenario())